@@ -10,6 +10,7 @@ from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
 
 from autogen.agents import WebScraperAgent, SearchAgent, ContentGenerationAgent, CriticAgent, TransactionAgent
+from autogen.agents.source import close_async_ollama_transport
 from autogen.services import setup_logging,  selector_func, log_agent_message, AmadeusService, GoogleMapsService, LocalStateService, RedisStorage, TimingTracker
 from autogen.prompts import selector_prompt, planning_agent_description, user_proxy_agent_description, planning_agent_prompt, planning_agent_prompt_no_critic
 
@@ -246,15 +247,24 @@ class AgentGroup:
     async def process_user_message(self, message: str, user_profile: dict, user_travel_details: dict) -> dict:
         path = f"{self.folder}/generated_plans.jsonl"
 
-        await self._local_state_service.set_user_profile(self._type_of_agent, self._session_id, user_profile=user_profile)
-        await self._local_state_service.set_user_travel_details(self._type_of_agent, self._session_id, travel_details=user_travel_details)
-        async for m in self.team.run_stream(task=message): 
-            log_agent_message(m)
-        # await Console(self.team.run_stream(task=message))
+        try:
+            await self._local_state_service.set_user_profile(self._type_of_agent, self._session_id, user_profile=user_profile)
+            await self._local_state_service.set_user_travel_details(self._type_of_agent, self._session_id, travel_details=user_travel_details)
+            async for m in self.team.run_stream(task=message): 
+                log_agent_message(m)
+            # await Console(self.team.run_stream(task=message))
+
+            plan = await self.retrieve_generated_plan()
+        finally:
+            # released even when the run fails or is cancelled
+            await self.aclose()
+        return plan
 
-        plan = await self.retrieve_generated_plan()
+    async def aclose(self) -> None:
+        """Release the connection pools bound to the running event loop; call before it ends."""
+        await self.web_scraper_agent.aclose() # release scraper connection pools
+        await close_async_ollama_transport() # and the Ollama connection pool
         await self._redis_store.aclose() # close redis after the task is done
-        return plan
 
     async def test_web_scraper_agent(self):
         self.web_scraper_agent = self.web_scraper_agent
@@ -267,6 +277,7 @@ class AgentGroup:
         print("=== Running WebScraperAgent.on_messages_stream ===")
         async for event in self.web_scraper_agent.on_messages_stream([test_message], cancellation_token=CancellationToken()):
             print(event)
+        await self.web_scraper_agent.aclose()
 
     async def test_search_agent(self):
         queries = [
@@ -141,7 +141,7 @@ class CriticAgent(AssistantAgent, Component[CriticAgentConfig]):
         response_text: str | None = None
 
         for attempt in range(max_retries):
-            response_text = self.critic_agent.run(itinerary_text, retry_message)
+            response_text = await self.critic_agent.arun(itinerary_text, retry_message)
             logger.verbose(f"[{self.name}] Critic Agent response (attempt {attempt+1}):\n{response_text}")
 
             if self.critic_agent.verify_response_format(response_text):
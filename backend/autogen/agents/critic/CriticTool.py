@@ -3,7 +3,7 @@ import json
 import logging
 
 from ._utils import critic_agent_prompt
-from autogen.agents.source import OllamaClient, get_safe_max_characters, check_number_of_characters
+from autogen.agents.source import OllamaClient, GENERATION_READ_TIMEOUT, get_safe_max_characters, check_number_of_characters
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +14,7 @@ class CriticTool:
         Initializes the FilterTool with user profile and shared OllamaClient.
         """
         self.model = model_name
-        self.llm_client = OllamaClient(model=model_name)
+        self.llm_client = OllamaClient(model=model_name, read_timeout=GENERATION_READ_TIMEOUT)
         self.valid_set = {"ACCEPT", "RE-WRITE"}
         self.prompt_template = critic_agent_prompt.replace(
             "{{user_profile}}", json.dumps(user_profile, indent=2)
@@ -32,10 +32,7 @@ class CriticTool:
             additional_info = "\n\n**Additional Information for Improvement:**\n" + additional_info
         return prompt + additional_info
 
-    def run(self, itinerary_text: str, additional_info: str = "") -> str:
-        """
-        Submits the filter prompt using the given content chunk.
-        """
+    def _prepare_prompt(self, itinerary_text: str, additional_info: str = "") -> str:
         prompt = self.build_prompt(itinerary_text, additional_info)
         curr_num_chars = check_number_of_characters(prompt)
         logger.info(f"[CriticTool] Prompt character count: {curr_num_chars}.")
@@ -45,10 +42,22 @@ class CriticTool:
             logger.warning(f"[CriticTool] Prompt exceeds safe character limit for model {self.llm_client.model}.")
 
         logger.verbose(f"[CriticTool] Running CriticTool with prompt:\n{prompt}\n")
-        result = self.llm_client.run(prompt) or ""
+        return prompt
+
+    def run(self, itinerary_text: str, additional_info: str = "") -> str:
+        """
+        Submits the filter prompt using the given content chunk.
+        """
+        result = self.llm_client.run(self._prepare_prompt(itinerary_text, additional_info)) or ""
         # print(f"[CriticTool] CriticTool result:\n{result}\n")
         return result
 
+    async def arun(self, itinerary_text: str, additional_info: str = "") -> str:
+        """
+        `run` for async callers (does not block the event loop).
+        """
+        return await self.llm_client.arun(self._prepare_prompt(itinerary_text, additional_info)) or ""
+
     def extract_decision(self, text: str) -> str:
         """
         Returns the final decision (ACCEPT, RE-WRITE), optionally sanitized.
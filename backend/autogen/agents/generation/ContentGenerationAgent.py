@@ -187,7 +187,7 @@ class ContentGenerationAgent(AssistantAgent, Component[ContentGenerationAgentCon
 
     async def generate_content(self, filtered_content: str, search_result: str, additional_instruction: str) -> str:
         logger.info(f"[ContentGenerationAgent] Starting to generate travel plan...")
-        generated_plan = self.content_generation_tool.run_content_generation(
+        generated_plan = await self.content_generation_tool.arun_content_generation(
             filtered_content=filtered_content,
             search_result=search_result,
             additional_instruction=additional_instruction
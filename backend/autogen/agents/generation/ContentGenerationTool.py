@@ -2,13 +2,13 @@ import json
 import logging
 
 from ._utils import content_generation_agent_prompt
-from autogen.agents.source import OllamaClient, get_safe_max_characters, check_number_of_characters
+from autogen.agents.source import OllamaClient, GENERATION_READ_TIMEOUT, get_safe_max_characters, check_number_of_characters
 
 logger = logging.getLogger(__name__)
 
 class ContentGenerationTool:
 
-    def __init__(self, user_profile: dict, user_travel_details: dict, llm_client: OllamaClient = OllamaClient(model="qwen2.5")):
+    def __init__(self, user_profile: dict, user_travel_details: dict, llm_client: OllamaClient = OllamaClient(model="qwen2.5", read_timeout=GENERATION_READ_TIMEOUT)):
         """
         Initializes the FilterTool with user profile and shared OllamaClient.
         """
@@ -28,10 +28,7 @@ class ContentGenerationTool:
         additional_instruction = "**Additional Information for Improvement:**\n" + additional_instruction.strip()
         return final_prompt + additional_instruction
 
-    def run_content_generation(self, filtered_content: str, search_result: str, additional_instruction: str = "") -> str:
-        """
-        Submits the filter prompt using the given content chunk.
-        """
+    def _prepare_prompt(self, filtered_content: str, search_result: str, additional_instruction: str = "") -> str:
         built_prompt = self.build_prompt(filtered_content, search_result, additional_instruction)
         logger.verbose(f"[ContentGenerationTool] Running content generation with prompt:\n{built_prompt}")
         logger.info(f"[ContentGenerationTool] Running content generation...")
@@ -42,6 +39,17 @@ class ContentGenerationTool:
         logger.info(f"[ContentGenerationTool] Safe character limit for model {self.llm_client.model}: {safe_num_chars}.")
         if curr_num_chars > safe_num_chars:
             logger.warning(f"[ContentGenerationTool] Prompt exceeds safe character limit for model {self.llm_client.model}.")
+        return built_prompt
 
-        return self.llm_client.run(built_prompt) or ""
+    def run_content_generation(self, filtered_content: str, search_result: str, additional_instruction: str = "") -> str:
+        """
+        Submits the filter prompt using the given content chunk.
+        """
+        return self.llm_client.run(self._prepare_prompt(filtered_content, search_result, additional_instruction)) or ""
+
+    async def arun_content_generation(self, filtered_content: str, search_result: str, additional_instruction: str = "") -> str:
+        """
+        `run_content_generation` for async callers (does not block the event loop).
+        """
+        return await self.llm_client.arun(self._prepare_prompt(filtered_content, search_result, additional_instruction)) or ""
     
\ No newline at end of file
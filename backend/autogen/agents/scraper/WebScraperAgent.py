@@ -1,5 +1,6 @@
 import os
-import json
+import time
+import asyncio
 import logging
 from pydantic import BaseModel
 from typing import Sequence, AsyncGenerator
@@ -11,8 +12,12 @@ from autogen_agentchat.messages import BaseChatMessage, TextMessage, BaseAgentEv
 
 from .WebScraperTool import WebScraperTool 
 from ._utils import web_scraper_agent_description
-from .helpers._nlp_filter_tool import NLPFilterTool
-from .helpers._llm_filter_tool import LLMFilterTool
+from .helpers._nlp_filter_tool import NLPFilterTool, DEFAULT_EMBEDDING_BACKEND, SUBCHUNK_POOLING, DEFAULT_HYBRID_BAND
+from .helpers._llm_filter_tool import LLMFilterTool, DEFAULT_LLM_CONCURRENCY, DEFAULT_LLM_TIMEOUT, DEFAULT_LLM_BATCH_SIZE, DEFAULT_LLM_BATCH_TIMEOUT, DEFAULT_LLM_BATCH_LINGER
+from .helpers._scraper_resources import acquire_scraper_resources, release_scraper_resources
+from .helpers._scrape_ledger import ScrapeLedger
+from .helpers._dedupe import NearDuplicateIndex, DEFAULT_SIMILARITY_THRESHOLD
+from .helpers._chunker import CHUNKER_CONFIGS
 
 from autogen.agents.source import get_dummy_scraped_content
 from autogen.services import TimingTracker, RedisStorage, LocalStateService
@@ -36,8 +41,19 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
             time_log_filename: str,
             log_path: str,
             fallback: bool = False, 
-            filter_method: str = "nlp", # or "llm"
+            filter_method: str = "nlp", # or "llm", or "hybrid" (NLP, with borderline relevance decided by the LLM)
             test_mode: bool = False,
+            dedupe_threshold: float | None = DEFAULT_SIMILARITY_THRESHOLD, # None disables near-duplicate collapsing
+            embedding_backend: str = DEFAULT_EMBEDDING_BACKEND, # "torch" or "onnx" (int8-quantized, CPU)
+            relevance_scoring: str = "document", # or "subchunk": pool the relevance of the document's chunks (NLP filter)
+            subchunk_pooling: str = "max", # or "topk_mean"
+            keep_subchunks: bool = False, # with "subchunk" scoring, keep only the relevant chunks of a kept page
+            chunking: dict | None = None, # chunker settings; defaults to CHUNKER_CONFIGS[filter_method]
+            llm_concurrency: int = DEFAULT_LLM_CONCURRENCY, # LLM filter requests in flight at once (Ollama parallel slots)
+            llm_timeout: float = DEFAULT_LLM_TIMEOUT, # seconds before an LLM filter request counts as DROP
+            llm_batch_size: int = DEFAULT_LLM_BATCH_SIZE, # documents packed into one LLM filter prompt
+            llm_batch_timeout: float = DEFAULT_LLM_BATCH_TIMEOUT, # seconds per batched LLM filter request
+            hybrid_band: float = DEFAULT_HYBRID_BAND, # "hybrid": relevance within this of RELEVANCE_THRESHOLD goes to the LLM
             model_client: ComponentModel = DEFAULT_MODEL_CLIENT, 
             name: str = "WebScraperAgent"
         ):
@@ -47,9 +63,15 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
         self.user_travel_details = user_travel_details
         self.user_id = user_profile['user_id']
 
-        self.scraper = WebScraperTool(user_profile=user_profile, user_travel_details=user_travel_details, log_path=log_path)
+        self.scraper = WebScraperTool(
+            user_profile=user_profile, user_travel_details=user_travel_details, log_path=log_path,
+            chunking=chunking if chunking is not None else CHUNKER_CONFIGS.get(filter_method)
+        )
         self.llm_filter_agent = LLMFilterTool(user_profile=user_profile, user_travel_details=user_travel_details) 
-        self.nlp_filter_agent = NLPFilterTool(user_profile=user_profile)
+        self.nlp_filter_agent = NLPFilterTool(user_profile=user_profile, embedding_backend=embedding_backend)
+        # the HTTP pool, browser pool and extraction processes are shared with the other agents of this process;
+        # this agent holds a reference to them from its first scrape until `aclose`
+        self._holds_scraper_resources = False
 
         self._type_of_agent = "WebScrapeService"
         self._session_id = session_id
@@ -68,9 +90,33 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
         self.total_kept_items = 0
         self.total_dropped_items = 0
 
+        if relevance_scoring not in ("document", "subchunk"):
+            raise ValueError(f"Unknown relevance_scoring '{relevance_scoring}', expected 'document' or 'subchunk'")
+        if subchunk_pooling not in SUBCHUNK_POOLING:
+            raise ValueError(f"Unknown subchunk_pooling '{subchunk_pooling}', expected one of {SUBCHUNK_POOLING}")
+        self._relevance_scoring = relevance_scoring
+        self._subchunk_pooling = subchunk_pooling
+        self._keep_subchunks = keep_subchunks
+
+        # shared by the batch and streaming LLM filter paths, so together they never exceed the server's slots
+        self._llm_concurrency = max(1, llm_concurrency)
+        self._llm_semaphore = asyncio.Semaphore(self._llm_concurrency)
+        # NLP scoring runs one document at a time (CPU-bound, and the tool's memos are not thread-safe)
+        self._nlp_lock = asyncio.Lock()
+        self._llm_timeout = llm_timeout
+        self._llm_batch_size = max(1, llm_batch_size)
+        self._llm_batch_timeout = llm_batch_timeout
+        self._hybrid_band = hybrid_band
+        self._escalations = {}   # round -> {"scored", "escalated", "overturned"} ("hybrid" filtering)
+
         self.max_tries = 3
         self.min_filtered_items = 5
 
+        # what this session already scraped/filtered for the current request (reused by fallback retries)
+        self._ledger = ScrapeLedger(session_id=session_id)
+        # SimHash index of every document filtered in this session (all rounds)
+        self._dedupe = NearDuplicateIndex(threshold=dedupe_threshold) if dedupe_threshold else None
+
 
     def get_number_of_rounds(self) -> int:
         return self.number_of_rounds
@@ -78,51 +124,37 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
     def get_list_of_scraping_history(self) -> list:
         return self.list_of_scraping_history
 
-    async def run_web_scrape(self, content: str, additional_instruction: str = "", cancellation_token: CancellationToken | None = None) -> dict:
-        timer_tag = f"webscraper:{self.number_of_rounds}_web_scraping"
-        self.timer.start(timer_tag)
-        logger.info(f"[WebScraperAgent] Received messages for web scraping...")
+    @staticmethod
+    def warm_up(filter_method: str = "nlp", embedding_backend: str = DEFAULT_EMBEDDING_BACKEND) -> None:
+        """Load the models used by `filter_method` once per process, before the first agent needs them."""
+        if filter_method in ("nlp", "hybrid"):
+            NLPFilterTool.warm_up(embedding_backend)
 
-        messages = [TextMessage(
-            content=content + additional_instruction,
-            role="system",
-            source="CriticAgent"
-        )]
-
-        response = await self.scraper.on_messages(messages, cancellation_token=cancellation_token)
-        # logger.verbose(f"[WebScraperAgent] Messages for scraping: {messages}")
-        content = response.chat_message.content
-
-        if not content or not content.strip().startswith("["):
-            raise ValueError(f"[WebScraperAgent] Expected JSON list but got: {repr(content)}")
-        # Defensive check: Ensure content is not empty or None
-        if not content or not content.strip():
-            raise ValueError("[WebScraperAgent] Error: Received empty or blank response content from scraper.")
-
-        try:
-            scraped_content = json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"[WebScraperAgent] JSON parsing failed. Content received:")
-            # logger.info(content)
-            raise ValueError(f"[WebScraperAgent] Failed to parse scraped content as JSON: {e}")
+    def _hold_scraper_resources(self) -> None:
+        if not self._holds_scraper_resources:
+            acquire_scraper_resources()
+            self._holds_scraper_resources = True
 
-        logger.info(f"[WebScraperAgent] Saving scraped content to local state service\n")
-        await self._local_state_service.set_scraped_content(agent_name=self.name, session_id=self._session_id, content=scraped_content)
-
-        self.timer.stop(timer_tag)
-        logger.info(f"[WebScraperAgent] Initial Web scraping completed in {self.timer.execution_times.get(timer_tag, 0)} seconds.\n")
-
-        # self.scraped_chunks_history.append(scraped_content)
-        return scraped_content
+    async def aclose(self) -> None:
+        """
+        Release this agent's references to the shared scraping resources (HTTP connection pool, Playwright browser pool,
+        extraction processes) and the similarity model; they are closed once no other agent uses them.
+        """
+        if self._holds_scraper_resources:
+            self._holds_scraper_resources = False
+            await release_scraper_resources()
+        self.nlp_filter_agent.close()
 
     async def run_filter(self, scraped_content: str) -> list:
         timer_tag = f"webscraper:{self.number_of_rounds}_running_filter"
         self.timer.start(timer_tag)
-        filtered_item = []
 
         if self._filter_method == "llm":
             logger.info(f"[WebScraperAgent] Running LLM-based filtering on scraped content...")
-            filtered_scraped_content = self.llm_filter_scraped_content(scraped_content=scraped_content)
+            filtered_scraped_content = await self.llm_filter_scraped_content(scraped_content=scraped_content)
+        elif self._filter_method == "hybrid":
+            logger.info(f"[WebScraperAgent] Running hybrid (NLP, then LLM for borderline content) filtering on scraped content...")
+            filtered_scraped_content = await self.hybrid_filter_scraped_content(scraped_content=scraped_content)
         else:
             logger.info(f"[WebScraperAgent] - Running {self._filter_method.upper()}-based filtering on scraped content...")
             filtered_scraped_content = self.nlp_filter_scraped_content(scraped_content=scraped_content)
@@ -130,8 +162,23 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
 
         logger.info(f"[WebScraperAgent] Saving filtered content to local state service\n")
         filtered_clean_content = f"Total Number of Filtered Chunks: {len(filtered_scraped_content)}\n\n"
+        filtered_item = self._format_filtered_items(self._expand_kept_subchunks(filtered_scraped_content))
+
+        # logger.verbose(f"[WebScraperAgent] Filtered content: {filtered_item}")
+
+        await self._local_state_service.set_filtered_chunks(agent_name=self.name, session_id=self._session_id, chunks=filtered_item) # TODO: change to filtered_item here, but it's a list so need to change the set_filtered_chunks function too
+
+        # self.filtered_chunks_history.append(filtered_clean_content)
+        self.timer.stop(timer_tag)
+        logger.info(f"[WebScraperAgent] Filtering completed in {self.timer.execution_times.get(timer_tag, 0)} seconds.\n")
+
+        return filtered_item
 
-        for i, item in enumerate(filtered_scraped_content):
+    @staticmethod
+    def _format_filtered_items(kept_chunks: list) -> list:
+        """Turn (content, filter_result) pairs into the filtered-chunk records stored in local state."""
+        filtered_item = []
+        for i, item in enumerate(kept_chunks):
             d = {}
             filtered_content = item[0]
             filtered_results = item[1]
@@ -141,16 +188,330 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
             d['clean_content'] = filtered_content.get('clean_content', '')
             d['filter_logs'] = filtered_results
             filtered_item.append(d)
+        return filtered_item
 
-        # logger.verbose(f"[WebScraperAgent] Filtered content: {filtered_item}")
+    def _near_duplicate(self, document: dict) -> tuple[int | None, dict | None]:
+        """
+        Look `document` up in the session's near-duplicate index.
+        Returns (fingerprint, match): match is None when the document has to be filtered; otherwise it is the
+        earlier entry it collapses into (preferring one from the current round), already recorded in the report.
+        """
+        if self._dedupe is None:
+            return None, None
+        fingerprint = self._dedupe.fingerprint(document)
+        # An earlier round's decision is only reused for the same query: after the critic asks for something else
+        # the page is filtered again. Entries that never got a decision (filtering cancelled by stop_after)
+        # cannot be reused either.
+        query = document.get("query", "")
+        matches = [
+            m for m in self._dedupe.matches(fingerprint)
+            if m["round"] == self.number_of_rounds or (m["decision"] is not None and m["query"] == query)
+        ]
+        if not matches:
+            return fingerprint, None
+        same_round = [m for m in matches if m["round"] == self.number_of_rounds]
+        match = same_round[0] if same_round else matches[0]
+        self._dedupe.record_collapse(document, match, self.number_of_rounds)
+        return fingerprint, match
+
+    def _reused_result(self, document: dict, near_duplicate: dict):
+        """
+        The filter result of `near_duplicate`, for reuse on `document`. Its `kept_subchunks` index the other
+        document's sub-chunks, so they are re-scored on this document's own ones (none: the page is kept whole).
+        """
+        filtered_result = near_duplicate["filter_result"]
+        if not isinstance(filtered_result, dict) or 'kept_subchunks' not in filtered_result:
+            return filtered_result
+        filtered_result = {k: v for k, v in filtered_result.items() if k != 'kept_subchunks'}
+        sub_chunks = self._sub_chunks(document)
+        if sub_chunks:
+            filtered_result['kept_subchunks'] = self.nlp_filter_agent.kept_subchunks(sub_chunks, document['query'])
+        return filtered_result
+
+    async def _areused_result(self, document: dict, near_duplicate: dict):
+        """`_reused_result` off the event loop (re-scoring embeds the sub-chunks), serialized with the other NLP calls."""
+        if not isinstance(near_duplicate["filter_result"], dict) or 'kept_subchunks' not in near_duplicate["filter_result"]:
+            return near_duplicate["filter_result"]
+        async with self._nlp_lock:
+            return await asyncio.to_thread(self._reused_result, document, near_duplicate)
+
+    def _index_filtered(self, document: dict, fingerprint: int | None, decision: str | None, filtered_result) -> int | None:
+        if self._dedupe is not None and fingerprint is not None:
+            return self._dedupe.add(document, fingerprint, decision, filtered_result, self.number_of_rounds)
+        return None
+
+    def _log_embedding_cache_stats(self) -> None:
+        if self._filter_method in ("nlp", "hybrid") and self.nlp_filter_agent.embedding_cache is not None:
+            logger.info(f"[WebScraperAgent] Embedding cache stats: {self.nlp_filter_agent.embedding_cache.stats()}")
+
+    def _log_llm_cache_stats(self) -> None:
+        if self._filter_method in ("llm", "hybrid") and self.llm_filter_agent.llm_client.cache is not None:
+            logger.info(f"[WebScraperAgent] LLM response cache stats: {self.llm_filter_agent.llm_client.cache.stats()}")
+
+    @staticmethod
+    def _sub_chunks(content: dict) -> list[str]:
+        """The document's chunks from split_into_chunks, flattened (they are stored as a list of lists)."""
+        flat = []
+        for item in content.get('chunks', []):
+            if isinstance(item, list):
+                flat.extend(c for c in item if c)
+            elif item:
+                flat.append(item)
+        return flat
+
+    def _expand_kept_subchunks(self, kept_chunks: list) -> list:
+        """With keep_subchunks, turn each kept page into one item per relevant chunk (same title / url)."""
+        if not self._keep_subchunks:
+            return kept_chunks
+        expanded = []
+        for content, filtered_result in kept_chunks:
+            indices = filtered_result.get('kept_subchunks') if isinstance(filtered_result, dict) else None
+            if not indices:
+                expanded.append((content, filtered_result))
+                continue
+            sub_chunks = self._sub_chunks(content)
+            indices = [i for i in indices if 0 <= i < len(sub_chunks)]
+            if not indices:
+                expanded.append((content, filtered_result))
+                continue
+            for i in indices:
+                expanded.append(({**content, 'clean_content': sub_chunks[i], 'subchunk_index': i}, filtered_result))
+        return expanded
+
+    def _nlp_filter_batch(self, contents: list, query: str) -> list:
+        """NLP filter for documents sharing one query, in one embedding batch (whole documents or sub-chunks)."""
+        metadatas = [content.get('metadata', {}) for content in contents]
+        if self._relevance_scoring == "subchunk":
+            return self.nlp_filter_agent.filter_documents(
+                [content['clean_content'] for content in contents], [self._sub_chunks(content) for content in contents],
+                query, metadatas, pooling=self._subchunk_pooling
+            )
+        return self.nlp_filter_agent.filter_chunks([content['clean_content'] for content in contents], query, metadatas)
+
+    async def _escalate_borderline(self, contents: list, filtered_results: list) -> list:
+        """
+        Hybrid filtering: send the NLP results whose relevance is borderline (see NLPFilterTool.is_borderline) to the LLM filter,
+        whose decision replaces the NLP one. Returns the results in order, each tagged with `decided_by`.
+        """
+        stats = self._escalations.setdefault(self.number_of_rounds, {"scored": 0, "escalated": 0, "overturned": 0})
+        results = [{**result, "decided_by": "nlp"} for result in filtered_results]
+        borderline = [k for k, result in enumerate(results) if self.nlp_filter_agent.is_borderline(result, self._hybrid_band)]
+        stats["scored"] += len(results)
+        stats["escalated"] += len(borderline)
+        if not borderline:
+            return results
+
+        responses = await self.llm_filter_agent.run_many(
+            [contents[k]['clean_content'] for k in borderline], timeout=self._llm_timeout, semaphore=self._llm_semaphore,
+            batch_size=self._llm_batch_size, batch_timeout=self._llm_batch_timeout
+        )
+        for k, response in zip(borderline, responses):
+            nlp_decision = results[k]['final_decision']
+            llm_decision = self.llm_filter_agent.extract_decision(response).upper()
+            if llm_decision != nlp_decision:
+                stats["overturned"] += 1
+            results[k] = {**results[k], "final_decision": llm_decision, "decided_by": "llm", "nlp_decision": nlp_decision, "llm_response": response}
+        return results
+
+    def _escalation_report(self) -> dict | None:
+        """How much of this round the hybrid filter sent to the LLM (None for the other filter methods)."""
+        if self._filter_method != "hybrid":
+            return None
+        stats = self._escalations.get(self.number_of_rounds, {"scored": 0, "escalated": 0, "overturned": 0})
+        return {
+            **stats,
+            "band": self._hybrid_band,
+            "escalation_rate": round(stats["escalated"] / stats["scored"], 4) if stats["scored"] else 0.0,
+        }
 
-        await self._local_state_service.set_filtered_chunks(agent_name=self.name, session_id=self._session_id, chunks=filtered_item) # TODO: change to filtered_item here, but it's a list so need to change the set_filtered_chunks function too
+    def _log_escalation_stats(self) -> None:
+        report = self._escalation_report()
+        if report is not None:
+            logger.info(f"[WebScraperAgent] Hybrid filter escalated {report['escalated']}/{report['scored']} documents to the LLM "
+                        f"(rate {report['escalation_rate']}, band ±{report['band']}), {report['overturned']} NLP decisions overturned.")
 
-        # self.filtered_chunks_history.append(filtered_clean_content)
-        self.timer.stop(timer_tag)
-        logger.info(f"[WebScraperAgent] Filtering completed in {self.timer.execution_times.get(timer_tag, 0)} seconds.\n")
+    async def filter_document(self, content: dict) -> tuple[str, dict | str]:
+        """
+        Run the configured filter on one scraped document, off the event loop.
+        Returns (decision, filter_result) with decision lowercased ("keep" / "drop").
+        """
+        clean_content = content['clean_content']
+        if self._filter_method == "llm":
+            async with self._llm_semaphore:
+                filtered_result = await self.llm_filter_agent.arun(clean_content, timeout=self._llm_timeout)
+            final_decision = self.llm_filter_agent.extract_decision(filtered_result).lower()
+        else:
+            async with self._nlp_lock:
+                filtered_result = (await asyncio.to_thread(self._nlp_filter_batch, [content], content['query']))[0]
+            if self._filter_method == "hybrid":
+                filtered_result = (await self._escalate_borderline([content], [filtered_result]))[0]
+            final_decision = filtered_result['final_decision'].lower()
+        return final_decision, filtered_result
+
+    async def filter_documents(self, contents: list) -> list[tuple[str, dict | str]]:
+        """
+        `filter_document` for several documents. With the LLM filter they share batched prompts (llm_batch_size);
+        otherwise each document is filtered on its own.
+        """
+        if self._filter_method == "llm" and len(contents) > 1:
+            responses = await self.llm_filter_agent.run_many(
+                [content['clean_content'] for content in contents], timeout=self._llm_timeout, semaphore=self._llm_semaphore,
+                batch_size=self._llm_batch_size, batch_timeout=self._llm_batch_timeout
+            )
+            return [(self.llm_filter_agent.extract_decision(response).lower(), response) for response in responses]
+        return [await self.filter_document(content) for content in contents]
+
+    async def run_streaming_scrape_and_filter(
+            self,
+            content: str,
+            additional_instruction: str = "",
+            stop_after: int | None = None,
+            cancellation_token: CancellationToken | None = None
+        ) -> tuple[list, list]:
+        """
+        Scrape and filter in one pipeline: every document is filtered as soon as it is extracted,
+        and each KEEP is written to local state right away. With `stop_after`, the remaining scrapes
+        are cancelled once that many documents have been kept.
+        URLs and content already processed for this request (see ScrapeLedger) are skipped, and new
+        KEEP documents are added to the ones kept by earlier attempts.
+        Returns (scraped_content of this attempt in source order, all filtered items kept so far).
+        """
+        attempt = self._ledger.next_attempt()
+        timer_tag = f"webscraper:{self.number_of_rounds}_streaming_scrape_and_filter"
+        first_kept_tag = f"webscraper:{self.number_of_rounds}_time_to_first_kept_chunk"
+        self.timer.start(timer_tag)
+        self.timer.start(first_kept_tag)
+        logger.info(f"[WebScraperAgent] Streaming scrape + {self._filter_method.upper()} filter (attempt {attempt})...")
 
-        return filtered_item
+        messages = [TextMessage(
+            content=content + additional_instruction,
+            role="system",
+            source="CriticAgent"
+        )]
+
+        scraped = {}
+        kept_before = self._ledger.kept_count()
+        filtering: dict[asyncio.Task, list[tuple[int, dict, int | None]]] = {}   # filter task -> [(source index, document, dedupe entry id)]
+        # with batched LLM prompts, documents wait here until a batch is full, the stream ends, or the linger time passes
+        batching = self._filter_method == "llm" and self._llm_batch_size > 1
+        batch: list[tuple[int, dict, int | None]] = []
+        batch_started = 0.0
+
+        def start_filtering(items: list) -> None:
+            filtering[asyncio.create_task(self.filter_documents([document for _, document, _ in items]))] = items
+
+        async def record(index: int, document: dict, final_decision: str, filtered_result) -> None:
+            logger.info(f"[WebScraperAgent] Source #{index+1} Decision: {final_decision}")
+            self._ledger.record(document, index, final_decision, filtered_result)
+            if final_decision == "keep":
+                if self._ledger.kept_count() == kept_before + 1:
+                    self.timer.stop(first_kept_tag)
+                    logger.info(f"[WebScraperAgent] First KEEP after {self.timer.execution_times.get(first_kept_tag, 0)}.")
+                await self._local_state_service.set_filtered_chunks(
+                    agent_name=self.name, session_id=self._session_id,
+                    chunks=self._format_filtered_items(self._expand_kept_subchunks(self._ledger.kept()))
+                )
+
+        def handle(index: int, document: dict):
+            """Start filtering a streamed document; returns (near-duplicate, dedupe entry id) when it reuses an earlier decision, else None."""
+            if document['clean_content'] == "":
+                return None
+
+            duplicate_of = self._ledger.duplicate_of(document)
+            if duplicate_of:
+                self._ledger.skipped_duplicate_content += 1
+                logger.info(f"[WebScraperAgent] Source #{index+1} has the same content as {duplicate_of}, skipping filter.")
+                return None
+
+            fingerprint, near_duplicate = self._near_duplicate(document)
+            if near_duplicate and near_duplicate["round"] == self.number_of_rounds:
+                logger.info(f"[WebScraperAgent] Source #{index+1} is a near-duplicate of {near_duplicate['url']} (similarity {near_duplicate['similarity']}), collapsed.")
+                self._ledger.record_collapsed(document, near_duplicate["url"])
+                return None
+            if near_duplicate:
+                # first copy in this round of a page filtered in an earlier round: reuse that decision
+                logger.info(f"[WebScraperAgent] Source #{index+1} reuses the round {near_duplicate['round']} decision of {near_duplicate['url']}.")
+                entry_id = self._index_filtered(document, fingerprint, near_duplicate["decision"], near_duplicate["filter_result"])
+                return near_duplicate, entry_id
+
+            # indexed right away so copies streamed while it is being filtered collapse into it
+            entry_id = self._index_filtered(document, fingerprint, None, None)
+            if batching:
+                batch.append((index, document, entry_id))
+            else:
+                start_filtering([(index, document, entry_id)])
+            return None
+
+        self._hold_scraper_resources()
+        stream = self.scraper.stream_scraped_content(messages, cancellation_token=cancellation_token, skip_url=self._ledger.should_skip)
+        next_document = asyncio.ensure_future(stream.__anext__())
+        try:
+            # documents are filtered concurrently (LLM requests bounded by _llm_semaphore) while the scrape goes on,
+            # and decisions are recorded in the order they complete
+            while next_document is not None or filtering or batch:
+                if batch and (len(batch) >= self._llm_batch_size or next_document is None
+                              or time.monotonic() - batch_started >= DEFAULT_LLM_BATCH_LINGER):
+                    start_filtering(batch)
+                    batch = []
+                    continue
+                waiting = set(filtering) | ({next_document} if next_document is not None else set())
+                linger = DEFAULT_LLM_BATCH_LINGER - (time.monotonic() - batch_started) if batch else None
+                done, _ = await asyncio.wait(waiting, timeout=linger, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task is next_document:
+                        try:
+                            index, document = task.result()
+                        except StopAsyncIteration:
+                            next_document = None
+                            continue
+                        next_document = asyncio.ensure_future(stream.__anext__())
+                        scraped[index] = document
+                        if not batch:
+                            batch_started = time.monotonic()
+                        reused = handle(index, document)
+                        if reused is not None:
+                            near_duplicate, entry_id = reused
+                            filtered_result = await self._areused_result(document, near_duplicate)
+                            if entry_id is not None:
+                                self._dedupe.set_decision(entry_id, near_duplicate["decision"], filtered_result)
+                            await record(index, document, near_duplicate["decision"], filtered_result)
+                    else:
+                        for (index, document, entry_id), (final_decision, filtered_result) in zip(filtering.pop(task), task.result()):
+                            if entry_id is not None:
+                                self._dedupe.set_decision(entry_id, final_decision, filtered_result)
+                            await record(index, document, final_decision, filtered_result)
+
+                if stop_after is not None and self._ledger.kept_count() >= stop_after:
+                    logger.info(f"[WebScraperAgent] Reached {stop_after} kept items, stopping the remaining scrapes and filters early.")
+                    break
+        finally:
+            leftovers = list(filtering) + ([next_document] if next_document is not None else [])
+            for task in leftovers:
+                task.cancel()
+            await asyncio.gather(*leftovers, return_exceptions=True)
+            await stream.aclose()
+
+        scraped_content = [scraped[i] for i in sorted(scraped)]
+        # the documents stay in memory (and in the tool's latest_scraped_chunks); only a summary is logged
+        logger.info(f"[WebScraperAgent] Scraper summary: {self.scraper.summarize_scraped_content(scraped_content)}")
+        filtered_item = self._format_filtered_items(self._expand_kept_subchunks(self._ledger.kept()))
+
+        self.total_kept_items = self._ledger.kept_count()
+        self.total_dropped_items = self._ledger.dropped_count()
+        logger.info(f"[WebScraperAgent] Attempt {attempt} kept {self.total_kept_items - kept_before} new items. Ledger: {self._ledger.summary()}\n")
+        if self._dedupe is not None:
+            logger.info(f"[WebScraperAgent] Near-duplicates collapsed this round: {self._dedupe.report(self.number_of_rounds)['collapsed']}")
+        self._log_embedding_cache_stats()
+        self._log_escalation_stats()
+        self._log_llm_cache_stats()
+
+        await self._local_state_service.set_scraped_content(agent_name=self.name, session_id=self._session_id, content=self._ledger.documents())
+        await self._local_state_service.set_filtered_chunks(agent_name=self.name, session_id=self._session_id, chunks=filtered_item)
+
+        self.timer.stop(timer_tag)
+        logger.info(f"[WebScraperAgent] Streaming scrape and filter completed in {self.timer.execution_times.get(timer_tag, 0)}.\n")
+        return scraped_content, filtered_item
 
     async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken | None = None) -> Response:
         logger.info(f"[WebScraperAgent] test_mode: {self._test_mode}, filter_method: {self._filter_method}, fallback: {self._fallback}")
@@ -167,9 +528,8 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
             filtered_content = await self.run_filter(dummy_content)
             logger.verbose(f"[WebScraperAgent] Filtered content: {filtered_content}")
         else:
-            scraped_content = await self.run_web_scrape(content, cancellation_token=cancellation_token)
-            # logger.verbose(f"[WebScraperAgent] Scraped content: {scraped_content}")
-            filtered_content = await self.run_filter(scraped_content)
+            self._ledger.start_request(content)
+            scraped_content, filtered_content = await self.run_streaming_scrape_and_filter(content, cancellation_token=cancellation_token)
             # logger.verbose(f"[WebScraperAgent] Filtered content: {filtered_content}")
 
         max_tries = self.max_tries
@@ -183,9 +543,9 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
         if self._fallback and len(filtered_content) < min_filtered_items:
             for attempt in range(max_tries):
                 logger.warning(f"[WebScraperAgent] Fallback mode: Filtered items {len(filtered_content)} is less than {min_filtered_items}. Re-running web scraping (attempt {attempt+1})...")
-                scraped_content = await self.run_web_scrape(content, additional_instruction, cancellation_token=cancellation_token)
-                # logger.verbose(f"[WebScraperAgent] Scraped content: {scraped_content}")
-                filtered_content = await self.run_filter(scraped_content)
+                scraped_content, filtered_content = await self.run_streaming_scrape_and_filter(
+                    content, additional_instruction, stop_after=min_filtered_items, cancellation_token=cancellation_token
+                )
                 # logger.verbose(f"[WebScraperAgent] Filtered content: {filtered_content}")
 
                 if len(filtered_content) >= min_filtered_items:
@@ -202,6 +562,9 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
             "length_of_filtered_items": len(filtered_content),
             "total_kept_items": self.total_kept_items,
             "total_dropped_items": self.total_dropped_items,
+            "ledger": self._ledger.summary(),
+            "near_duplicates": self._dedupe.report(self.number_of_rounds) if self._dedupe else None,
+            "hybrid_escalation": self._escalation_report(),
             # "messages": content,
             # "filtered_content": filtered_content
             # "raw_scraped_content": scraped_content,
@@ -224,50 +587,110 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
         self.timer.save_as_text(filename=self.time_log_filename)
         yield result
 
-    def nlp_filter_scraped_content(self, scraped_content: dict) -> dict:
+    def _nlp_score_scraped_content(self, scraped_content: list) -> tuple[dict, dict]:
         """
-        Processes the filtered content and returns it as a string.
+        NLP-score a scraped batch, collapsing near-duplicates and scoring documents that share a query in one batch.
+        Returns (content index -> filter result, content index -> dedupe entry id for the freshly scored ones).
         """
-        timer_tag = f"webscraper:{self.number_of_rounds}_running_nlp_filter"
-        self.timer.start(timer_tag)
-        logger.info(f"[WebScraperAgent] Filtering scraped content...")
+        filtered_results = {}   # content index -> filter result
+        scored = {}             # content index -> dedupe entry id (None without dedupe)
+        pending = {}            # query -> [(content index, content)] scored in one batch
+        for i, content in enumerate(scraped_content):
+            if content['clean_content'] == "":
+                continue
+            fingerprint, near_duplicate = self._near_duplicate(content)
+            if near_duplicate and near_duplicate["round"] == self.number_of_rounds:
+                logger.info(f"[WebScraperAgent] Content #{i+1} is a near-duplicate of {near_duplicate['url']}, collapsed.")
+                continue
+            if near_duplicate:
+                filtered_results[i] = self._reused_result(content, near_duplicate)
+                self._index_filtered(content, fingerprint, near_duplicate["decision"], filtered_results[i])
+            else:
+                # indexed right away so later copies in this batch collapse into it
+                scored[i] = self._index_filtered(content, fingerprint, None, None)
+                pending.setdefault(content['query'], []).append((i, content))
+
+        for query, items in pending.items():
+            logger.info(f"[WebScraperAgent] Scoring {len(items)} contents in one batch...")
+            batch_results = self._nlp_filter_batch([content for _, content in items], query)
+            for (i, _), filtered_result in zip(items, batch_results):
+                filtered_results[i] = filtered_result
+        return filtered_results, scored
+
+    def _tally_nlp_decisions(self, scraped_content: list, filtered_results: dict, scored: dict) -> list:
+        """Record the final decisions of a scored batch (dedupe index, counters, logs); returns the kept (content, result) pairs in order."""
         kept_chunks = []
         keep_decision_count = 0
         dropped_decision_count = 0
 
-        for i, content in enumerate(scraped_content):
-            logger.info(f"[WebScraperAgent] Processing content {i+1}/{len(scraped_content)}...")
-            query = content['query']
-            metadata = content.get('metadata', {})
-            clean_content = content['clean_content']
-            final_decision = "unknown"
-            # results = []
+        for i, entry_id in scored.items():
+            if entry_id is not None:
+                self._dedupe.set_decision(entry_id, filtered_results[i]['final_decision'].lower(), filtered_results[i])
 
-            if clean_content != "":
-                filtered_result = self.nlp_filter_agent.filter_chunk(clean_content, query, metadata)
-                logger.verbose(f"[WebScraperAgent] Filtered result for content {i+1}: {filtered_result}")
-                final_decision = filtered_result['final_decision'].lower()
+        for i in sorted(filtered_results):
+            content = scraped_content[i]
+            filtered_result = filtered_results[i]
+            logger.verbose(f"[WebScraperAgent] Filtered result for content {i+1}: {filtered_result}")
+            final_decision = filtered_result['final_decision'].lower()
 
-                logger.info(f"[WebScraperAgent] Content #{i+1} Decision: {final_decision}")
+            logger.info(f"[WebScraperAgent] Content #{i+1} Decision: {final_decision}")
 
-                if final_decision == "keep":
-                    kept_chunks.append((content, filtered_result))
-                    # logger.verbose(f"Title: {content['title']}\nURL: {content['url']}\nClean Content:\n{clean_content}\n\n")
-                    keep_decision_count += 1
-                else:
-                    dropped_decision_count += 1
+            if final_decision == "keep":
+                kept_chunks.append((content, filtered_result))
+                # logger.verbose(f"Title: {content['title']}\nURL: {content['url']}\nClean Content:\n{clean_content}\n\n")
+                keep_decision_count += 1
+            else:
+                dropped_decision_count += 1
 
         logger.info(f"[WebScraperAgent] Total Kept: {keep_decision_count}, Dropped: {dropped_decision_count}\n")
         logger.info(f"[WebScraperAgent] Processed {len(scraped_content)} chunks of scraped content, and kept {len(kept_chunks)} relevant chunks after filtering.\n")
 
         self.total_kept_items = keep_decision_count
         self.total_dropped_items = dropped_decision_count
+        self._log_embedding_cache_stats()
+        return kept_chunks
+
+    def nlp_filter_scraped_content(self, scraped_content: dict) -> dict:
+        """
+        Processes the filtered content and returns it as a string.
+        """
+        timer_tag = f"webscraper:{self.number_of_rounds}_running_nlp_filter"
+        self.timer.start(timer_tag)
+        logger.info(f"[WebScraperAgent] Filtering scraped content...")
+
+        filtered_results, scored = self._nlp_score_scraped_content(scraped_content)
+        kept_chunks = self._tally_nlp_decisions(scraped_content, filtered_results, scored)
 
         self.timer.stop(timer_tag)
         logger.info(f"[WebScraperAgent] Finished filtering in {self.timer.execution_times.get(timer_tag, 0)} seconds.\n")
         return kept_chunks
-    
-    def llm_filter_scraped_content(self, scraped_content: dict) -> dict:
+
+    async def hybrid_filter_scraped_content(self, scraped_content: dict) -> dict:
+        """
+        NLP filter first; only the freshly scored documents whose relevance is borderline go to the LLM filter.
+        """
+        timer_tag = f"webscraper:{self.number_of_rounds}_running_hybrid_filter"
+        self.timer.start(timer_tag)
+        logger.info(f"[WebScraperAgent] Filtering scraped content (NLP, LLM for borderline relevance)...")
+
+        filtered_results, scored = self._nlp_score_scraped_content(scraped_content)
+        indices = sorted(scored)
+        escalated = await self._escalate_borderline([scraped_content[i] for i in indices], [filtered_results[i] for i in indices])
+        filtered_results.update(zip(indices, escalated))
+        kept_chunks = self._tally_nlp_decisions(scraped_content, filtered_results, scored)
+        self._log_escalation_stats()
+        self._log_llm_cache_stats()
+
+        self.timer.stop(timer_tag)
+        logger.info(f"[WebScraperAgent] Finished filtering in {self.timer.execution_times.get(timer_tag, 0)} seconds.\n")
+        return kept_chunks
+
+    async def llm_filter_scraped_content(self, scraped_content: dict) -> dict:
+        """
+        LLM filter over a scraped batch. Requests run concurrently (bounded by llm_concurrency, each with llm_timeout),
+        so the batch takes about as long as its slowest requests rather than the sum of all of them.
+        Decisions are logged and kept in source order.
+        """
         timer_tag = f"webscraper:{self.number_of_rounds}_running_llm_filter"
         self.timer.start(timer_tag)
         logger.info(f"[WebScraperAgent] Filtering scraped content using LLM...")
@@ -275,34 +698,55 @@ class WebScraperAgent(AssistantAgent, Component[WebScraperAgentConfig]):
         keep_decision_count = 0
         dropped_decision_count = 0
 
+        filtered_results = {}   # content index -> raw LLM response
+        pending = []            # (content index, content, dedupe entry id) sent to the LLM
         for i, content in enumerate(scraped_content):
-            logger.info(f"[WebScraperAgent] Processing content {i+1}/{len(scraped_content)}...")
-            query = content['query']
-            metadata = content.get('metadata', {})
+            if content['clean_content'] == "":
+                continue
+            fingerprint, near_duplicate = self._near_duplicate(content)
+            if near_duplicate and near_duplicate["round"] == self.number_of_rounds:
+                logger.info(f"[WebScraperAgent] Content #{i+1} is a near-duplicate of {near_duplicate['url']}, collapsed.")
+                continue
+            if near_duplicate:
+                filtered_results[i] = near_duplicate["filter_result"]
+                self._index_filtered(content, fingerprint, near_duplicate["decision"], near_duplicate["filter_result"])
+            else:
+                # indexed right away so later copies in this batch collapse into it
+                entry_id = self._index_filtered(content, fingerprint, None, None)
+                pending.append((i, content, entry_id))
+
+        logger.info(f"[WebScraperAgent] Sending {len(pending)} contents to the LLM filter ({self._llm_concurrency} at a time)...")
+        responses = await self.llm_filter_agent.run_many(
+            [content['clean_content'] for _, content, _ in pending], timeout=self._llm_timeout, semaphore=self._llm_semaphore,
+            batch_size=self._llm_batch_size, batch_timeout=self._llm_batch_timeout
+        )
+        for (i, _, entry_id), filtered_result in zip(pending, responses):
+            filtered_results[i] = filtered_result
+            if entry_id is not None:
+                self._dedupe.set_decision(entry_id, self.llm_filter_agent.extract_decision(filtered_result).lower(), filtered_result)
+
+        for i in sorted(filtered_results):
+            content = scraped_content[i]
             clean_content = content['clean_content']
-            final_decision = "unknown"
-            # results = []
-
-            if clean_content != "":
-                logger.verbose(f"[WebScraperAgent] Clean content for filtering {i+1}:\n{clean_content}\n")
-                filtered_result = self.llm_filter_agent.run(clean_content)
-                logger.info(f"[WebScraperAgent] Filtered result for content {i+1}: {filtered_result}")
-                reasoning = self.llm_filter_agent.extract_reasoning(filtered_result)
-                final_decision = self.llm_filter_agent.extract_decision(filtered_result).lower()
-
-                logger.info(f"[WebScraperAgent] Content #{i+1} Decision: {final_decision}")
-
-                if final_decision == "keep":
-                    kept_chunks.append((content, filtered_result))
-                    logger.info(f"[WebScraperAgent] Kept content {i+1} with reasoning: {reasoning}")
-                    logger.verbose(f"Title: {content['title']}\nURL: {content['url']}\nClean Content:\n{clean_content}\n\n")
-                    keep_decision_count += 1
-                else:
-                    dropped_decision_count += 1
-                    logger.info(f"[WebScraperAgent] Dropped content {i+1} with reasoning: {reasoning}")
+            filtered_result = filtered_results[i]
+            logger.info(f"[WebScraperAgent] Filtered result for content {i+1}: {filtered_result}")
+            reasoning = self.llm_filter_agent.extract_reasoning(filtered_result)
+            final_decision = self.llm_filter_agent.extract_decision(filtered_result).lower()
+
+            logger.info(f"[WebScraperAgent] Content #{i+1} Decision: {final_decision}")
+
+            if final_decision == "keep":
+                kept_chunks.append((content, filtered_result))
+                logger.info(f"[WebScraperAgent] Kept content {i+1} with reasoning: {reasoning}")
+                logger.verbose(f"Title: {content['title']}\nURL: {content['url']}\nClean Content:\n{clean_content}\n\n")
+                keep_decision_count += 1
+            else:
+                dropped_decision_count += 1
+                logger.info(f"[WebScraperAgent] Dropped content {i+1} with reasoning: {reasoning}")
 
         logger.info(f"[WebScraperAgent] Total Kept: {keep_decision_count}, Dropped: {dropped_decision_count}\n")
         logger.info(f"[WebScraperAgent] Processed {len(scraped_content)} chunks of scraped content, and kept {len(kept_chunks)} relevant chunks after filtering.\n")
+        self._log_llm_cache_stats()
 
         self.timer.stop(timer_tag)
         logger.info(f"[WebScraperAgent] Finished filtering in {self.timer.execution_times.get(timer_tag, 0)} seconds.\n")
@@ -1,14 +1,16 @@
 import json
+import asyncio
 import logging
 import requests
-from typing import Sequence
+from typing import Sequence, AsyncGenerator, Callable
 from autogen_core import CancellationToken
 from autogen_agentchat.base import Response
 from autogen_agentchat.agents import BaseChatAgent
 from autogen_agentchat.messages import TextMessage, BaseChatMessage
 
 from ._utils import web_scraper_prompt, web_scraper_agent_description
-from .helpers._save_content_to_file import save_sources_to_file
+from .helpers._save_content_to_file import save_sources_to_file, iter_scraped_sources, DEFAULT_MAX_SCRAPE_WORKERS, DEFAULT_PER_URL_TIMEOUT, DEFAULT_OVERALL_TIMEOUT
+from .helpers._page_cache import get_page_cache
 
 from autogen.agents.source import generate_user_query
 
@@ -27,6 +29,11 @@ class WebScraperTool(BaseChatAgent):
         name: str = "WebScraperTool",
         focus_mode: str = "webSearch",
         optimization_mode: str = "balanced",
+        max_scrape_workers: int = DEFAULT_MAX_SCRAPE_WORKERS,
+        per_url_timeout: float | None = DEFAULT_PER_URL_TIMEOUT, # None: derived from the fetch timeouts
+        overall_scrape_timeout: float | None = DEFAULT_OVERALL_TIMEOUT,
+        render_mode: str = "light", # or "full"
+        chunking: dict | None = None, # chunk_text settings (see CHUNKER_CONFIGS); None keeps split_into_chunks
     ):
         super().__init__(name=name, description=web_scraper_agent_description)
 
@@ -45,6 +52,15 @@ class WebScraperTool(BaseChatAgent):
 
         self.log_path = log_path
 
+        self.max_scrape_workers = max_scrape_workers
+        self.per_url_timeout = per_url_timeout
+        self.overall_scrape_timeout = overall_scrape_timeout
+        self.render_mode = render_mode
+        self.chunking = chunking
+
+        # structured results of the last scrape (on_messages or stream_scraped_content), kept out of the chat message
+        self.latest_scraped_chunks: list = []
+
     def build_payload(self, query: str) -> dict:
         return {
             "chatModel": {"provider": self.llm_provider, "name": self.chat_model_name},
@@ -62,11 +78,7 @@ class WebScraperTool(BaseChatAgent):
     async def on_reset(self, cancellation_token: CancellationToken) -> None:
         pass
 
-    async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken | None = None) -> Response:
-
-        logger.info(f"[WebScraperTool] Log path set to: {self.log_path}")
-        cancellation_token = cancellation_token or CancellationToken()
-
+    def build_query(self, messages: Sequence[BaseChatMessage]) -> str:
         message = messages[-1]
         content = message.content.strip().lower()
         msg_content = content.replace("WebScraperAgent:", "").replace("webscraperagent:", "").strip()
@@ -78,38 +90,119 @@ class WebScraperTool(BaseChatAgent):
 
         # logger.info(f"[WebScraperTool] Received message: {msg_content}")
         logger.info(f"[WebScraperTool] Generated query: {query}")
-        
+        return query
+
+    async def search_sources(self, query: str) -> list:
+        """Ask Perplexica for sources; the HTTP call runs in a worker thread so the event loop keeps going."""
         payload = self.build_payload(query)
 
         logger.info(f"[WebScraperTool] Sending request to {self.api_url} with payload")
+        response = await asyncio.to_thread(requests.post, self.api_url, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        return result["sources"]
+
+    async def stream_scraped_content(
+        self,
+        messages: Sequence[BaseChatMessage],
+        cancellation_token: CancellationToken | None = None,
+        skip_url: Callable[[str], bool] | None = None,
+    ) -> AsyncGenerator[tuple[int, dict], None]:
+        """
+        Yields `(source_index, scraped_document)` as soon as each source is scraped and extracted,
+        so the caller can filter documents while the rest are still being fetched.
+        Sources for which `skip_url(url)` is true are not fetched at all.
+        """
+        query = self.build_query(messages)
+        self.latest_scraped_chunks = []
         try:
-            response = requests.post(self.api_url, json=payload)
-            response.raise_for_status()
-            result = response.json()
+            sources = await self.search_sources(query)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[WebScraperTool] Web scraping failed: {e}")
+            return
+
+        if skip_url is not None:
+            new_sources = [source for source in sources if not skip_url(source['metadata']['url'])]
+            if len(new_sources) < len(sources):
+                logger.info(f"[WebScraperTool] Skipping {len(sources) - len(new_sources)} already processed sources.")
+            sources = new_sources
+
+        logger.info(f"[WebScraperTool] Streaming scrape of {len(sources)} sources...")
+        scraped = iter_scraped_sources(
+            query,
+            sources,
+            log_path=self.log_path,
+            max_workers=self.max_scrape_workers,
+            per_url_timeout=self.per_url_timeout,
+            overall_timeout=self.overall_scrape_timeout,
+            render_mode=self.render_mode,
+            chunking=self.chunking,
+        )
+        try:
+            async for index, document in scraped:
+                if cancellation_token is not None and cancellation_token.is_cancelled():
+                    logger.warning(f"[WebScraperTool] Scrape cancelled.")
+                    break
+                self.latest_scraped_chunks.append(document)
+                yield index, document
+        finally:
+            await scraped.aclose()
+            logger.info(f"[WebScraperTool] Page cache stats: {get_page_cache().stats()}")
+
+    def get_latest_scraped_content(self) -> list:
+        return self.latest_scraped_chunks
+
+    @staticmethod
+    def summarize_scraped_content(info: list) -> str:
+        """Small JSON summary for the chat message; the documents themselves stay in `latest_scraped_chunks`."""
+        return json.dumps({
+            "scraped_sources": len(info),
+            "sources_with_content": sum(1 for item in info if item.get("clean_content")),
+            "urls": [item.get("url", "") for item in info],
+        })
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken | None = None) -> Response:
+
+        logger.info(f"[WebScraperTool] Log path set to: {self.log_path}")
+        cancellation_token = cancellation_token or CancellationToken()
+
+        query = self.build_query(messages)
+        self.latest_scraped_chunks = []
+
+        try:
+            sources = await self.search_sources(query)
             info = None
 
-            info = await save_sources_to_file(query, result["sources"], log_path=self.log_path)
+            info = await save_sources_to_file(
+                query,
+                sources,
+                log_path=self.log_path,
+                max_workers=self.max_scrape_workers,
+                per_url_timeout=self.per_url_timeout,
+                overall_timeout=self.overall_scrape_timeout,
+                render_mode=self.render_mode,
+                chunking=self.chunking,
+            )
             self.latest_scraped_chunks = info
+            logger.info(f"[WebScraperTool] Page cache stats: {get_page_cache().stats()}")
             # self.scraped_chunks_history.append(info)
 
             logger.info(f"[WebScraperTool] Starting to process scraped content...")
             if info:
                 logger.info(f"[WebScraperTool] Successfully scraped {len(info)} chunks of information.")
-                response_as_str = json.dumps(info, indent=2)
-                return Response(chat_message=TextMessage(content=response_as_str, source=self.name))
             else:
                 error_msg = "No relevant information found. Please try a different query."
                 logger.warning(f"[WebScraperTool] {error_msg}")
-                
-                return Response(chat_message=TextMessage(content=json.dumps([]), source=self.name))
+
+            return Response(chat_message=TextMessage(content=self.summarize_scraped_content(info), source=self.name))
             
         except requests.exceptions.Timeout:
             error_msg = f"Request timed out."
             logger.error(f"[WebScraperTool] {error_msg}")
-            return Response(chat_message=TextMessage(content=json.dumps([]), source=self.name))
+            return Response(chat_message=TextMessage(content=self.summarize_scraped_content([]), source=self.name))
 
         except requests.exceptions.RequestException as e:
             error_msg = f"Web scraping failed: {e}"
             logger.error(f"[WebScraperTool] {error_msg}")
-            return Response(chat_message=TextMessage(content=json.dumps([]), source=self.name))
+            return Response(chat_message=TextMessage(content=self.summarize_scraped_content([]), source=self.name))
 
@@ -0,0 +1,253 @@
+import time
+import asyncio
+import logging
+import psutil
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/112.0.0.0 Safari/537.36"
+)
+DEFAULT_MAX_PAGES = 4                 # pages rendered at the same time
+DEFAULT_MAX_PAGES_PER_BROWSER = 50    # recycle the browser after serving this many pages
+DEFAULT_MAX_BROWSER_MEMORY_MB = 1024  # recycle the browser once its processes use more than this (RSS)
+DEFAULT_MEMORY_CHECK_INTERVAL = 10.0  # seconds between two measurements of the browser's memory
+
+
+def _is_chromium(process: psutil.Process) -> bool:
+    try:
+        name = process.name().lower()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+    return "chrom" in name or "headless_shell" in name
+
+
+def _chromium_processes() -> dict[int, psutil.Process]:
+    """The Chromium processes spawned by this process (through the Playwright driver), by pid."""
+    try:
+        return {child.pid: child for child in psutil.Process().children(recursive=True) if _is_chromium(child)}
+    except psutil.Error:
+        return {}
+
+
+def _new_browser_roots(before: set[int]) -> set[int]:
+    """Pids of the Chromium main processes started since `before` (those whose parent is not Chromium itself)."""
+    processes = _chromium_processes()
+    roots = set()
+    for pid, process in processes.items():
+        if pid in before:
+            continue
+        try:
+            if process.ppid() not in processes:
+                roots.add(pid)
+        except psutil.Error:
+            continue
+    return roots
+
+
+def _browser_memory_mb(exclude_roots: set[int] | None = None) -> float:
+    """
+    Total RSS (MB) of the Chromium processes spawned by this process, leaving out the process trees
+    rooted at `exclude_roots` (retired browsers still draining their last pages).
+    """
+    processes = _chromium_processes()
+    excluded = set()
+    for pid in exclude_roots or ():
+        process = processes.get(pid)
+        if process is None:
+            continue
+        excluded.add(pid)
+        try:
+            excluded.update(child.pid for child in process.children(recursive=True))
+        except psutil.Error:
+            continue
+    total = 0
+    for pid, process in processes.items():
+        if pid in excluded:
+            continue
+        try:
+            total += process.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """
+    Long-lived Playwright Chromium shared by all dynamic fetches.
+    Each lease gets a fresh browser context + page; at most `max_pages` are open at once.
+    The browser is recycled after `max_pages_per_browser` pages or when it grows past `max_memory_mb`
+    (measured at most every `memory_check_interval` seconds); a retired browser is closed as soon as its
+    last in-flight page is released.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        max_pages_per_browser: int = DEFAULT_MAX_PAGES_PER_BROWSER,
+        max_memory_mb: float = DEFAULT_MAX_BROWSER_MEMORY_MB,
+        memory_check_interval: float = DEFAULT_MEMORY_CHECK_INTERVAL,
+        user_agent: str = DEFAULT_BROWSER_USER_AGENT,
+        headless: bool = True,
+    ):
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_interval = memory_check_interval
+        self.user_agent = user_agent
+        self.headless = headless
+
+        self._semaphore = asyncio.Semaphore(max(1, max_pages))
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._pages_served = 0
+        self._leases: dict = {}      # browser -> number of pages currently open on it
+        self._retired: set = set()   # browsers waiting for their last page before closing
+        self._roots: dict = {}       # browser -> pids of its Chromium main process(es), found at launch
+        self._memory_checked_at = 0.0
+        self._over_memory = None     # browser found above max_memory_mb by the last measurement
+        self._closed = False
+
+    def _needs_recycle(self) -> bool:
+        if self._pages_served >= self.max_pages_per_browser:
+            logger.info(f"[BrowserPool] Browser served {self._pages_served} pages, recycling.")
+            return True
+        if self._over_memory is not None and self._over_memory is self._browser:
+            return True
+        return False
+
+    async def _check_memory(self) -> None:
+        # walking the process tree is slow: at most once per interval, in a worker thread, without holding the lock
+        if not self.max_memory_mb or self._browser is None:
+            return
+        now = time.monotonic()
+        if now - self._memory_checked_at < self.memory_check_interval:
+            return
+        self._memory_checked_at = now
+        browser = self._browser
+        # only the current browser counts: retired ones are on their way out
+        retired_roots = {pid for retired in self._retired for pid in self._roots.get(retired, ())}
+        memory_mb = await asyncio.to_thread(_browser_memory_mb, retired_roots)
+        if memory_mb > self.max_memory_mb and browser is self._browser:
+            logger.info(f"[BrowserPool] Browser memory {memory_mb:.0f}MB above {self.max_memory_mb}MB, recycling.")
+            self._over_memory = browser
+
+    async def _retire(self, browser) -> None:
+        if self._leases.get(browser, 0) > 0:
+            self._retired.add(browser)
+            return
+        self._leases.pop(browser, None)
+        self._roots.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning(f"[BrowserPool] Failed to close browser: {e}")
+
+    async def _acquire(self):
+        await self._check_memory()
+        async with self._lock:
+            if self._closed:
+                raise RuntimeError("BrowserPool is closed")
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            if self._browser is not None and (not self._browser.is_connected() or self._needs_recycle()):
+                await self._retire(self._browser)
+                self._browser = None
+
+            if self._browser is None:
+                logger.info(f"[BrowserPool] Launching Chromium (headless={self.headless}).")
+                before = set(await asyncio.to_thread(_chromium_processes))
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                self._roots[self._browser] = await asyncio.to_thread(_new_browser_roots, before)
+                self._pages_served = 0
+                self._over_memory = None
+
+            browser = self._browser
+            self._pages_served += 1
+            self._leases[browser] = self._leases.get(browser, 0) + 1
+            return browser
+
+    async def _release(self, browser) -> None:
+        async with self._lock:
+            self._leases[browser] = self._leases.get(browser, 1) - 1
+            if browser in self._retired and self._leases[browser] <= 0:
+                self._retired.discard(browser)
+                await self._retire(browser)
+
+    @asynccontextmanager
+    async def page(self):
+        """Lease a fresh page in its own browser context; the context is closed on exit."""
+        async with self._semaphore:
+            browser = await self._acquire()
+            context = None
+            try:
+                context = await browser.new_context(user_agent=self.user_agent)
+                page = await context.new_page()
+                yield page
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                await self._release(browser)
+
+    async def close(self) -> None:
+        """Close every browser and stop Playwright."""
+        async with self._lock:
+            self._closed = True
+            browsers = set(self._leases) | self._retired
+            if self._browser is not None:
+                browsers.add(self._browser)
+            for browser in browsers:
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+            self._browser = None
+            self._leases.clear()
+            self._retired.clear()
+            self._roots.clear()
+            self._over_memory = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+_shared_pool: BrowserPool | None = None
+_shared_loop: asyncio.AbstractEventLoop | None = None
+
+def _discard_stale_pool(pool: BrowserPool, loop: asyncio.AbstractEventLoop) -> None:
+    # Playwright is driven from `loop`, so the pool can only be closed there
+    if not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(pool.close(), loop)
+    else:
+        logger.warning(f"[BrowserPool] Event loop ended without close_browser_pool(); dropping its pool.")
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Return the process-wide browser pool for the running event loop, creating it on first use;
+    close it with `close_browser_pool` before its loop ends.
+    """
+    global _shared_pool, _shared_loop
+    loop = asyncio.get_running_loop()
+    if _shared_pool is None or _shared_loop is not loop:
+        if _shared_pool is not None:
+            _discard_stale_pool(_shared_pool, _shared_loop)
+        _shared_pool = BrowserPool()
+        _shared_loop = loop
+    return _shared_pool
+
+async def close_browser_pool():
+    """Shut down the shared browser pool (if it was started)."""
+    global _shared_pool, _shared_loop
+    if _shared_pool is not None:
+        pool = _shared_pool
+        _shared_pool = None
+        _shared_loop = None
+        await pool.close()
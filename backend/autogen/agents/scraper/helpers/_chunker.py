@@ -0,0 +1,113 @@
+import re
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Chunking per filter method. "tokenizer" is "whitespace", "tiktoken:<encoding>" or "hf:<model name>".
+#   nlp: stay under the 256-token window of all-MiniLM-L6-v2 (special tokens included)
+#   llm: larger chunks, measured with a BPE tokenizer close to the Ollama models'
+CHUNKER_CONFIGS = {
+    "nlp": {"tokenizer": "hf:sentence-transformers/all-MiniLM-L6-v2", "min_tokens": 64, "max_tokens": 240, "overlap_tokens": 32},
+    "llm": {"tokenizer": "tiktoken:cl100k_base", "min_tokens": 200, "max_tokens": 800, "overlap_tokens": 64},
+}
+CHUNKER_CONFIGS["hybrid"] = CHUNKER_CONFIGS["nlp"]   # every chunk is embedded; only borderline pages reach the LLM
+
+# sentence ends (. ! ? followed by space and an upper-case / digit / quote start) and line breaks
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])|\s*\n+\s*")
+_WORD_RE = re.compile(r"\S+")
+
+
+def _whitespace_counter(texts: list[str]) -> list[int]:
+    return [len(_WORD_RE.findall(t)) for t in texts]
+
+
+def _load_tokenizer(name: str):
+    """Return a batch counter: list[str] -> list[int]."""
+    if name.startswith("tiktoken:"):
+        import tiktoken
+        encoding = tiktoken.get_encoding(name.split(":", 1)[1])
+        return lambda texts: [len(ids) for ids in encoding.encode_ordinary_batch(texts)]
+    if name.startswith("hf:"):
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(name.split(":", 1)[1])
+        return lambda texts: [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+    return _whitespace_counter
+
+
+@lru_cache(maxsize=8)
+def token_counter(name: str):
+    """
+    Batch token counter for `name`, loaded once per process; falls back to whitespace words if the tokenizer
+    cannot be loaded (the fallback is remembered too, so a missing tokenizer is tried and reported once).
+    """
+    try:
+        return _load_tokenizer(name)
+    except Exception as e:
+        logger.warning(f"[Chunker] Tokenizer {name} unavailable ({e}), counting whitespace words instead.")
+        return _whitespace_counter
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s and s.strip()]
+
+
+def _split_oversized(sentence: str, count: int, max_tokens: int) -> list[str]:
+    """Cut a sentence longer than max_tokens into word slices of roughly max_tokens each."""
+    words = sentence.split()
+    per_slice = max(1, int(len(words) * max_tokens / count))
+    return [" ".join(words[i:i + per_slice]) for i in range(0, len(words), per_slice)]
+
+
+def chunk_text(text: str, tokenizer: str = "whitespace", min_tokens: int = 64, max_tokens: int = 240, overlap_tokens: int = 0) -> list[str]:
+    """
+    Split `text` into chunks of at most `max_tokens` tokens (for `tokenizer`), snapped to sentence boundaries.
+    All sentences are tokenized in one batch call. Consecutive chunks share up to `overlap_tokens` tokens of
+    whole trailing sentences, and a final chunk shorter than `min_tokens` is merged into the previous one when it fits.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+    count = token_counter(tokenizer)
+    counts = count(sentences)
+
+    # sentences that alone exceed the budget are cut into slices (re-counted together)
+    if any(c > max_tokens for c in counts):
+        pieces = []
+        for sentence, c in zip(sentences, counts):
+            pieces.extend(_split_oversized(sentence, c, max_tokens) if c > max_tokens else [sentence])
+        sentences = pieces
+        counts = count(sentences)
+
+    chunks: list[tuple[list[str], int]] = []   # (sentences, tokens)
+    current: list[str] = []
+    current_counts: list[int] = []
+    current_tokens = 0
+    carried = 0   # sentences at the start of `current` repeated from the previous chunk
+    for sentence, c in zip(sentences, counts):
+        if current and current_tokens + c > max_tokens:
+            chunks.append((current, current_tokens))
+            # overlap: carry whole trailing sentences of the previous chunk (never all of it)
+            carried, carry_tokens = 0, 0
+            for sc in reversed(current_counts[1:]):
+                if carry_tokens + sc > overlap_tokens or carry_tokens + sc + c > max_tokens:
+                    break
+                carried += 1
+                carry_tokens += sc
+            current = current[len(current) - carried:] if carried else []
+            current_counts = current_counts[len(current_counts) - carried:] if carried else []
+            current_tokens = carry_tokens
+        current.append(sentence)
+        current_counts.append(c)
+        current_tokens += c
+
+    if current:
+        tail_tokens = sum(current_counts[carried:]) if chunks else sum(current_counts)
+        if chunks and current_tokens < min_tokens and chunks[-1][1] + tail_tokens <= max_tokens:
+            # too short on its own: append its new sentences to the previous chunk
+            previous, previous_tokens = chunks.pop()
+            chunks.append((previous + current[carried:], previous_tokens + tail_tokens))
+        else:
+            chunks.append((current, current_tokens))
+
+    return [" ".join(sentences) for sentences, _ in chunks]
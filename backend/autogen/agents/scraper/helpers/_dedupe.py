@@ -0,0 +1,124 @@
+import re
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+DEFAULT_SIMILARITY_THRESHOLD = 0.95   # 1 - hamming_distance / 64, i.e. up to 3 differing bits
+SHINGLE_SIZE = 3                      # word n-grams hashed into the fingerprint
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> int:
+    """64-bit SimHash of `text` over lowercased word shingles (each shingle weighted by its count)."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return 0
+    if len(tokens) < shingle_size:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    counts: dict[str, int] = {}
+    for shingle in shingles:
+        counts[shingle] = counts.get(shingle, 0) + 1
+    for shingle, count in counts.items():
+        h = _hash64(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if (h >> bit) & 1 else -count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def similarity(a: int, b: int) -> float:
+    return 1.0 - bin(a ^ b).count("1") / SIMHASH_BITS
+
+
+class NearDuplicateIndex:
+    """
+    Session-scoped SimHash index of the documents already filtered by the WebScraperAgent.
+    `matches(fingerprint)` returns the earlier entries whose fingerprint is within the similarity threshold,
+    so mirrored / syndicated pages are scored once and reuse the earlier decision.
+    Lookups use band buckets (pigeonhole on the allowed Hamming distance) instead of a full scan.
+    Every collapsed document is recorded in `collapsed` for reporting.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.max_distance = int((1.0 - threshold) * SIMHASH_BITS)
+        # max_distance + 1 bands: two fingerprints within max_distance bits agree on at least one band
+        band_count = min(self.max_distance + 1, SIMHASH_BITS)
+        width = SIMHASH_BITS // band_count
+        self._bands = [(i * width, SIMHASH_BITS if i == band_count - 1 else (i + 1) * width) for i in range(band_count)]
+        self._buckets: list[dict[int, list[int]]] = [{} for _ in self._bands]
+        self._entries: list[dict] = []
+        self.collapsed: list[dict] = []
+
+    def _band_keys(self, fingerprint: int) -> list[int]:
+        return [(fingerprint >> start) & ((1 << (end - start)) - 1) for start, end in self._bands]
+
+    @staticmethod
+    def fingerprint(document: dict) -> int:
+        return simhash(document.get("clean_content", ""))
+
+    def matches(self, fingerprint: int) -> list[dict]:
+        """Earlier entries within the threshold (each with its "similarity"), most similar first."""
+        found = []
+        seen = set()
+        for buckets, key in zip(self._buckets, self._band_keys(fingerprint)):
+            for entry_id in buckets.get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                entry = self._entries[entry_id]
+                score = similarity(fingerprint, entry["simhash"])
+                if score >= self.threshold:
+                    found.append({**entry, "similarity": round(score, 4)})
+        return sorted(found, key=lambda m: m["similarity"], reverse=True)
+
+    def add(self, document: dict, fingerprint: int, decision: str | None, filter_result=None, round_number: int = 0) -> int:
+        """Index a filtered document; returns its entry id (for `set_decision` when it is scored later)."""
+        entry_id = len(self._entries)
+        self._entries.append({
+            "url": document.get("url", ""),
+            "query": document.get("query", ""),
+            "simhash": fingerprint,
+            "decision": decision,
+            "filter_result": filter_result,
+            "round": round_number,
+        })
+        for buckets, key in zip(self._buckets, self._band_keys(fingerprint)):
+            buckets.setdefault(key, []).append(entry_id)
+        return entry_id
+
+    def set_decision(self, entry_id: int, decision: str | None, filter_result=None) -> None:
+        self._entries[entry_id]["decision"] = decision
+        self._entries[entry_id]["filter_result"] = filter_result
+
+    def record_collapse(self, document: dict, match: dict, round_number: int) -> None:
+        self.collapsed.append({
+            "url": document.get("url", ""),
+            "duplicate_of": match["url"],
+            "similarity": match["similarity"],
+            "decision": match["decision"],
+            "round": round_number,
+            "original_round": match["round"],
+        })
+
+    def report(self, round_number: int | None = None) -> dict:
+        """Collapsed documents (optionally only those of one round)."""
+        items = [c for c in self.collapsed if round_number is None or c["round"] == round_number]
+        return {"threshold": self.threshold, "indexed": len(self._entries), "collapsed": len(items), "items": items}
@@ -0,0 +1,237 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process lock, use one cache directory per process there
+    fcntl = None
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_CACHE_DIR = os.getenv("TRAVELAGENT_EMBEDDING_CACHE_DIR", "log/embedding_cache")
+DEFAULT_LRU_SIZE = 4096            # vectors kept in process memory
+DEFAULT_MAX_ROWS = 200_000         # vectors kept on disk per model; new vectors are not persisted beyond this
+INITIAL_CAPACITY = 1024            # rows allocated in the memory-mapped file before it first grows
+
+
+class EmbeddingCache:
+    """
+    Two-level cache of text embeddings for one model, keyed by sha256(text).
+    An in-process LRU sits in front of a persistent store made of a memory-mapped float32 matrix
+    (<dir>/<model>/vectors.f32, one row per text) and an append-only index (<dir>/<model>/index.log, "<hash> <row>").
+    Rows are written before their index line, so a crash never leaves an index entry pointing at garbage.
+    Processes sharing the directory allocate rows and append to the index under an flock on <dir>/<model>/lock,
+    catching up on each other's index lines first.
+    Hit/miss counters are exposed via `stats()`.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: str = DEFAULT_EMBEDDING_CACHE_DIR,
+        lru_size: int = DEFAULT_LRU_SIZE,
+        max_rows: int = DEFAULT_MAX_ROWS,
+    ):
+        self.model_name = model_name
+        self.lru_size = lru_size
+        self.max_rows = max_rows
+        self.model_dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        self._vectors_path = os.path.join(self.model_dir, "vectors.f32")
+        self._index_path = os.path.join(self.model_dir, "index.log")
+        self._lock_path = os.path.join(self.model_dir, "lock")
+
+        self._lock = threading.Lock()
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._rows: dict[str, int] = {}
+        self._dim: int | None = None
+        self._next_row = 0
+        self._index_offset = 0         # bytes of index.log already read
+        self._capacity = 0
+        self._matrix: np.memmap | None = None
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        self._load_index()
+
+    # ----------------- persistent store -----------------
+
+    @contextmanager
+    def _disk_lock(self):
+        """
+        Exclusive lock on the store across processes sharing the cache directory (several workers / agents):
+        rows are allocated and the index appended under it. A no-op where fcntl is unavailable.
+        """
+        with open(self._lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync_locked(self) -> None:
+        """Read the index lines appended since the last read (by any process) and map rows the file grew to hold."""
+        try:
+            with open(self._index_path, "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read()
+        except OSError:
+            return
+        # only complete lines: a line without its newline is still being written
+        data = data[:data.rfind(b"\n") + 1]
+        lines = data.decode("utf-8").splitlines()
+        if self._index_offset == 0 and lines:
+            header = lines.pop(0).split()
+            if len(header) != 2 or header[0] != "dim":
+                return
+            self._dim = int(header[1])
+        self._index_offset += len(data)
+        if self._dim is None:
+            return
+
+        capacity = os.path.getsize(self._vectors_path) // (self._dim * 4) if os.path.exists(self._vectors_path) else 0
+        for line in lines:
+            parts = line.split()
+            if len(parts) == 2 and parts[1].isdigit() and int(parts[1]) < capacity:   # skip rows never fully written
+                row = int(parts[1])
+                self._rows[parts[0]] = row
+                self._next_row = max(self._next_row, row + 1)
+        if capacity > self._capacity:
+            self._map(capacity)
+
+    def _map(self, capacity: int) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        self._capacity = capacity
+
+    def _load_index(self) -> None:
+        try:
+            with self._disk_lock():
+                self._sync_locked()
+        except (OSError, ValueError):
+            self._rows.clear()
+            return
+        logger.info(f"[EmbeddingCache] Loaded {len(self._rows)} cached embeddings for {self.model_name}.")
+
+    def _ensure_capacity(self, rows_needed: int) -> None:
+        if rows_needed <= self._capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, self._capacity)
+        while capacity < rows_needed:
+            capacity *= 2
+        capacity = min(capacity, self.max_rows)
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+            self._matrix = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self._dim * 4)
+        self._map(capacity)
+
+    def _persist_locked(self, entries: list[tuple[str, np.ndarray]]) -> None:
+        with self._disk_lock():
+            # other processes may have appended rows since our last write: allocate after theirs
+            self._sync_locked()
+            if self._dim is None:
+                self._dim = int(entries[0][1].shape[-1])
+                header = f"dim {self._dim}\n".encode("utf-8")
+                with open(self._index_path, "wb") as f:
+                    f.write(header)
+                self._index_offset = len(header)
+
+            new_entries = {k: v for k, v in entries if k not in self._rows and v.shape[-1] == self._dim}
+            room = self.max_rows - self._next_row
+            if room <= 0 or not new_entries:
+                return
+            entries = list(new_entries.items())[:room]
+
+            first_row = self._next_row
+            self._ensure_capacity(first_row + len(entries))
+            for offset, (_, vector) in enumerate(entries):
+                self._matrix[first_row + offset] = vector
+            self._matrix.flush()
+            lines = "".join(f"{key} {first_row + offset}\n" for offset, (key, _) in enumerate(entries)).encode("utf-8")
+            with open(self._index_path, "ab") as f:
+                f.write(lines)
+            self._index_offset += len(lines)
+            for offset, (key, _) in enumerate(entries):
+                self._rows[key] = first_row + offset
+            self._next_row = first_row + len(entries)
+
+    # ----------------- lookups -----------------
+
+    @staticmethod
+    def key_for(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember_locked(self, key: str, vector: np.ndarray) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        """Cached embedding for each text (None on a miss), checking memory first, then disk."""
+        results: list[np.ndarray | None] = []
+        with self._lock:
+            for text in texts:
+                key = self.key_for(text)
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                elif key in self._rows and self._matrix is not None:
+                    vector = np.array(self._matrix[self._rows[key]])
+                    self._remember_locked(key, vector)
+                    self.counters["disk_hits"] += 1
+                else:
+                    self.counters["misses"] += 1
+                results.append(vector)
+        return results
+
+    def put_many(self, texts: list[str], vectors) -> None:
+        """Store freshly computed embeddings (one row of `vectors` per text)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not texts:
+            return
+        entries = [(self.key_for(text), vectors[i]) for i, text in enumerate(texts)]
+        with self._lock:
+            for key, vector in entries:
+                self._remember_locked(key, vector)
+            try:
+                self._persist_locked(entries)
+            except OSError as e:
+                logger.warning(f"[EmbeddingCache] Failed to persist embeddings for {self.model_name}: {e}")
+            self.counters["stores"] += len(entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            lookups = hits + self.counters["misses"]
+            return {
+                **self.counters,
+                "memory_entries": len(self._lru),
+                "disk_entries": len(self._rows),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_shared_caches: dict[str, EmbeddingCache] = {}
+_shared_lock = threading.Lock()
+
+def get_embedding_cache(model_name: str) -> EmbeddingCache:
+    """Return the process-wide embedding cache for `model_name`, creating it on first use."""
+    with _shared_lock:
+        if model_name not in _shared_caches:
+            _shared_caches[model_name] = EmbeddingCache(model_name)
+        return _shared_caches[model_name]
@@ -0,0 +1,83 @@
+import os
+import asyncio
+import logging
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACTION_WORKERS = min(4, os.cpu_count() or 1)
+# imported once by the fork server, so every worker starts with the extraction stack (trafilatura, bs4) loaded
+EXTRACTION_PRELOAD = ["autogen.agents.scraper.helpers._scrape_content_from_url"]
+
+
+def _mp_context():
+    # The pool starts on the first extraction, when the event loop, HTTP, Playwright and model threads are
+    # already running: forking that process can leave a worker stuck on a lock another thread held.
+    # Workers come from a fork server (a clean single-threaded process) instead, or are spawned.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(EXTRACTION_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class ExtractionExecutor:
+    """
+    Process pool for the CPU-bound part of scraping (trafilatura metadata + text, BeautifulSoup fallback, chunking).
+    `extract(html)` returns {"metadata", "clean_content", "chunks"} without blocking the event loop.
+    With max_workers=0, or if the pool breaks, extraction runs in a thread instead.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_EXTRACTION_WORKERS):
+        self.max_workers = max_workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _get_pool(self) -> ProcessPoolExecutor | None:
+        if self.max_workers <= 0:
+            return None
+        if self._pool is None:
+            logger.info(f"[ExtractionExecutor] Starting process pool with {self.max_workers} workers.")
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+        return self._pool
+
+    async def extract(self, html: str, **kwargs) -> dict:
+        from ._scrape_content_from_url import extract_document
+
+        if not html:
+            return extract_document(html, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                return await loop.run_in_executor(pool, functools.partial(extract_document, html, **kwargs))
+            except BrokenProcessPool:
+                logger.warning("[ExtractionExecutor] Process pool broke, restarting it and extracting in a thread.")
+                self.shutdown()
+        return await asyncio.to_thread(extract_document, html, **kwargs)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            pool = self._pool
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_executor: ExtractionExecutor | None = None
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """Return the process-wide extraction executor (the pool itself starts on first use)."""
+    global _shared_executor
+    if _shared_executor is None:
+        _shared_executor = ExtractionExecutor()
+    return _shared_executor
+
+def shutdown_extraction_executor() -> None:
+    """Stop the shared extraction worker processes, if they were started."""
+    global _shared_executor
+    if _shared_executor is not None:
+        _shared_executor.shutdown()
+        _shared_executor = None
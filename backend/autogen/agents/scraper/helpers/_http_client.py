@@ -0,0 +1,144 @@
+import codecs
+import asyncio
+import logging
+import httpx
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; SmartScraper/1.0)"
+DEFAULT_MAX_CONNECTIONS = 20            # total open connections in the pool
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10  # idle connections kept around for reuse
+DEFAULT_KEEPALIVE_EXPIRY = 30.0         # seconds an idle connection stays in the pool
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 4    # avoid hammering a single site
+DEFAULT_MAX_BODY_BYTES = 5 * 1024 * 1024
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _codec(charset: str | None) -> str:
+    """The declared charset if Python knows it, else utf-8 (servers do send unknown or misspelled names)."""
+    if charset:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            logger.info(f"[AsyncFetchClient] Unknown charset '{charset}', decoding as utf-8.")
+    return "utf-8"
+
+
+class FetchResult:
+    """Outcome of a single fetch: status, headers and the (possibly truncated) decoded body."""
+
+    def __init__(self, url: str, status_code: int, headers: dict, text: str = "", truncated: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.truncated = truncated
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+
+class AsyncFetchClient:
+    """
+    Shared async HTTP client for the scraper.
+    One connection pool (keep-alive, HTTP/2 when available) with a per-host concurrency cap,
+    and streamed body reads that stop once `max_body_bytes` is reached.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_body_bytes = max_body_bytes
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            headers={"User-Agent": user_agent},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_semaphores[host]
+
+    async def fetch(self, url: str, timeout: float = 10, headers: dict | None = None) -> FetchResult:
+        """
+        GET `url` and return a FetchResult. Raises httpx.HTTPError on transport errors.
+        Non-2xx responses are returned as-is (with an empty body) so callers can handle 304 etc.
+        """
+        async with self._host_semaphore(url):
+            async with self._client.stream("GET", url, headers=headers, timeout=timeout) as resp:
+                response_headers = dict(resp.headers)
+                if not (200 <= resp.status_code < 300):
+                    return FetchResult(str(resp.url), resp.status_code, response_headers)
+
+                body = bytearray()
+                truncated = False
+                async for chunk in resp.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= self.max_body_bytes:
+                        truncated = True
+                        del body[self.max_body_bytes:]
+                        logger.info(f"[AsyncFetchClient] Body of {url} truncated at {self.max_body_bytes} bytes.")
+                        break
+
+                text = bytes(body).decode(_codec(resp.charset_encoding), errors="replace")
+                return FetchResult(str(resp.url), resp.status_code, response_headers, text, truncated)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_shared_client: AsyncFetchClient | None = None
+_shared_loop: asyncio.AbstractEventLoop | None = None
+
+def _discard_stale_client(client: AsyncFetchClient, loop: asyncio.AbstractEventLoop) -> None:
+    # the client's connections belong to `loop`, so it can only be closed there
+    if not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        logger.warning(f"[AsyncFetchClient] Event loop ended without close_fetch_client(); dropping its client.")
+
+def get_fetch_client() -> AsyncFetchClient:
+    """
+    Return the process-wide fetch client, creating it on first use.
+    The pool is bound to the running event loop, so a new loop (e.g. another asyncio.run) gets a new client;
+    close it with `close_fetch_client` before its loop ends.
+    """
+    global _shared_client, _shared_loop
+    loop = asyncio.get_running_loop()
+    if _shared_client is None or _shared_loop is not loop:
+        if _shared_client is not None:
+            _discard_stale_client(_shared_client, _shared_loop)
+        _shared_client = AsyncFetchClient()
+        _shared_loop = loop
+    return _shared_client
+
+async def close_fetch_client():
+    """Close the shared fetch client (if any) and release its connections."""
+    global _shared_client, _shared_loop
+    if _shared_client is not None:
+        client = _shared_client
+        _shared_client = None
+        _shared_loop = None
+        await client.aclose()
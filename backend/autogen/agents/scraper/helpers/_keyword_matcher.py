@@ -0,0 +1,71 @@
+import re
+import bisect
+from typing import Dict, List, Iterable
+
+_SEPARATOR = "\x00"
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def _at_word_boundary(text: str, i: int) -> bool:
+    """Same rule as regex `\\b`: exactly one side of position i is a word character."""
+    left = i > 0 and _is_word_char(text[i - 1])
+    right = i < len(text) and _is_word_char(text[i])
+    return left != right
+
+
+class KeywordMatcher:
+    """
+    Finds several keyword groups in one pass over the lowercased text.
+    All terms are compiled into a single alternation inside a lookahead (longest first), so matches may overlap;
+    terms that are prefixes of a longer match at the same position are resolved through a prefix map.
+    Each group is matched either as a whole word (like `\\bterm\\b`) or as a plain substring (like `term in text`).
+    `scan` returns every group's hits in the order the terms were given, each term at most once.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]], whole_word: Iterable[str] = ()):
+        self.groups = {name: list(dict.fromkeys(t.lower() for t in terms if t)) for name, terms in groups.items()}
+        self.whole_word = set(whole_word)
+
+        self._term_groups: Dict[str, List[str]] = {}
+        for name, terms in self.groups.items():
+            for term in terms:
+                self._term_groups.setdefault(term, []).append(name)
+
+        terms = sorted(self._term_groups, key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(t) for t in terms) + "))") if terms else None
+        # for each term, every (shorter) term that is a prefix of it, longest first
+        self._prefixes = {t: [p for p in terms if t.startswith(p)] for t in terms}
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        return self.scan_many([text])[0]
+
+    def scan_many(self, texts: List[str]) -> List[Dict[str, List[str]]]:
+        """
+        `scan` for several texts with a single regex pass: the lowercased texts are joined with NUL
+        (which no term contains and which is not a word character), and each match is mapped back to its text.
+        """
+        found = [{name: set() for name in self.groups} for _ in texts]
+        if self._pattern is not None and texts:
+            lowered = [text.lower() for text in texts]
+            joined = _SEPARATOR.join(lowered)
+            starts = []
+            offset = 0
+            for text in lowered:
+                starts.append(offset)
+                offset += len(text) + len(_SEPARATOR)
+
+            for m in self._pattern.finditer(joined):
+                start = m.start()
+                hits = found[bisect.bisect_right(starts, start) - 1]
+                for term in self._prefixes[m.group(1)]:
+                    end = start + len(term)
+                    for name in self._term_groups[term]:
+                        if term in hits[name]:
+                            continue
+                        if name in self.whole_word and not (_at_word_boundary(joined, start) and _at_word_boundary(joined, end)):
+                            continue
+                        hits[name].add(term)
+        return [{name: [t for t in terms if t in hits[name]] for name, terms in self.groups.items()} for hits in found]
@@ -1,14 +1,36 @@
+import os
+import re
 import json
 import asyncio
+import logging
 
-from ._utils import filter_tool_prompt
-from autogen.agents.source import OllamaClient
+from ._utils import filter_tool_prompt, filter_tool_batch_prompt
+from autogen.agents.source import OllamaClient, get_safe_max_characters, check_number_of_characters
+
+logger = logging.getLogger(__name__)
+
+# requests in flight at once; match the Ollama server's parallel slots (OLLAMA_NUM_PARALLEL on the server)
+DEFAULT_LLM_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+DEFAULT_LLM_TIMEOUT = 120.0   # seconds per filter request
+DEFAULT_LLM_BATCH_SIZE = 1    # chunks packed into one prompt; 1 sends every chunk on its own
+DEFAULT_LLM_BATCH_TIMEOUT = 300.0   # seconds per batched request, however many chunks it carries
+DEFAULT_LLM_BATCH_LINGER = 1.0      # seconds a streamed partial batch waits for more chunks before it is sent
+# context window of the Ollama server (OLLAMA_CONTEXT_LENGTH on the server); a batched prompt must fit in it
+OLLAMA_CONTEXT_LENGTH = int(os.getenv("OLLAMA_CONTEXT_LENGTH", "4096"))
+
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_TAGGED_DECISION_RE = re.compile(r"<decision\s+id\s*=\s*[\"']?(\d+)[\"']?\s*>\W*(KEEP|DROP)\W*</decision>", re.IGNORECASE)
+_TAGGED_REASON_RE = re.compile(r"<reason\s+id\s*=\s*[\"']?(\d+)[\"']?\s*>(.*?)</reason>", re.IGNORECASE | re.DOTALL)
+# looser "3: KEEP" / "Chunk 3 - DROP" lines, for answers that ignore the tags
+_PLAIN_DECISION_RE = re.compile(r"^\W*(?:chunk\s*)?#?(\d+)\s*[\]:.)\-]+\W*(KEEP|DROP)\b", re.IGNORECASE | re.MULTILINE)
 
 class LLMFilterTool:
 
     def __init__(self, user_profile: dict, user_travel_details: dict, llm_client: OllamaClient = OllamaClient()):
         """
         Initializes the FilterTool with user profile and shared OllamaClient.
+        The default client samples with the model's default settings, so its answers are not cached; pass a client
+        created with options={"temperature": 0} to reuse cached KEEP/DROP answers.
         """
         self.llm_client = llm_client
         self.valid_set = {"KEEP", "DROP"}
@@ -17,6 +39,11 @@ class LLMFilterTool:
         ).replace(
             "{{user_travel_details}}", json.dumps(user_travel_details, indent=2)
         )
+        self.batch_prompt_template = filter_tool_batch_prompt.replace(
+            "{{user_profile}}", json.dumps(user_profile, indent=2)
+        ).replace(
+            "{{user_travel_details}}", json.dumps(user_travel_details, indent=2)
+        )
 
     def run(self, chunk_text: str) -> str:
         """
@@ -25,6 +52,152 @@ class LLMFilterTool:
         prompt = self.prompt_template.replace("{{chunk_text}}", chunk_text)
         return self.llm_client.run(prompt) or ""
 
+    async def arun(self, chunk_text: str, timeout: float = DEFAULT_LLM_TIMEOUT) -> str:
+        """
+        `run` without blocking the event loop. Gives up after `timeout` seconds and returns "" (which reads as DROP).
+        """
+        return await self.arun_prompt(self.prompt_template.replace("{{chunk_text}}", chunk_text), timeout=timeout)
+
+    async def arun_prompt(self, prompt: str, timeout: float = DEFAULT_LLM_TIMEOUT) -> str:
+        try:
+            return await asyncio.wait_for(self.llm_client.arun(prompt, timeout=timeout), timeout=timeout) or ""
+        except asyncio.TimeoutError:
+            logger.warning(f"[LLMFilterTool] Filter request timed out after {timeout}s.")
+            return ""
+
+    # ----------------- batched prompts -----------------
+
+    @staticmethod
+    def _format_chunk(number: int, chunk_text: str) -> str:
+        return f'<chunk id="{number}">\n{chunk_text}\n</chunk>'
+
+    def build_batch_prompt(self, chunk_texts: list[str]) -> str:
+        """One prompt carrying the profile preamble once and every chunk numbered from 1."""
+        chunks = "\n\n".join(self._format_chunk(i + 1, chunk_text) for i, chunk_text in enumerate(chunk_texts))
+        return self.batch_prompt_template.replace("{{chunk_count}}", str(len(chunk_texts))).replace("{{chunks}}", chunks)
+
+    def batch_max_chars(self) -> int:
+        """Character budget of a batched prompt: the model's safe limit, capped by the server's context window."""
+        context_chars = int(OLLAMA_CONTEXT_LENGTH * 3 * 0.7)  # same ~3 chars per token and 70% headroom as get_safe_max_characters
+        try:
+            return min(get_safe_max_characters(self.llm_client.model), context_chars)
+        except ValueError:
+            return context_chars
+
+    def pack_batches(self, chunk_texts: list[str], batch_size: int, max_chars: int | None = None) -> list[list[int]]:
+        """
+        Group chunk indices, in order, into prompts of at most `batch_size` chunks whose batched prompt
+        stays under `max_chars` (default `batch_max_chars()`). A chunk too large to share a prompt gets one of its own.
+        """
+        max_chars = max_chars or self.batch_max_chars()
+        empty_prompt_chars = check_number_of_characters(self.build_batch_prompt([]))
+        batches, current, current_chars = [], [], empty_prompt_chars
+        for i, chunk_text in enumerate(chunk_texts):
+            chunk_chars = check_number_of_characters(self._format_chunk(batch_size, chunk_text)) + 2
+            if current and (len(current) >= batch_size or current_chars + chunk_chars > max_chars):
+                batches.append(current)
+                current, current_chars = [], empty_prompt_chars
+            current.append(i)
+            current_chars += chunk_chars
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def parse_batch_decisions(response: str, count: int) -> dict[int, tuple[str, str]]:
+        """
+        Map 0-based chunk index -> (decision, reasoning) for each of the `count` chunks the batched answer decides.
+        Tagged `<decision id="N">` lines are preferred, loose "N: KEEP" lines are accepted otherwise;
+        numbers out of range and chunks given conflicting decisions are left out (they need a fallback).
+        """
+        text = _THINK_RE.sub("", response or "")
+        matches = _TAGGED_DECISION_RE.findall(text) or _PLAIN_DECISION_RE.findall(text)
+        reasons = {int(number): reason.strip() for number, reason in _TAGGED_REASON_RE.findall(text)}
+
+        decisions, conflicting = {}, set()
+        for number, decision in matches:
+            number, decision = int(number), decision.upper()
+            if not 1 <= number <= count:
+                continue
+            if decisions.get(number, decision) != decision:
+                conflicting.add(number)
+            decisions[number] = decision
+        return {number - 1: (decision, reasons.get(number, "")) for number, decision in decisions.items() if number not in conflicting}
+
+    def _split_batch_response(self, response: str, count: int) -> list[str | None]:
+        """Per-chunk responses in the single-chunk format (so extract_decision / extract_reasoning work); None where undecided."""
+        decisions = self.parse_batch_decisions(response, count)
+        if len(decisions) < count:
+            logger.warning(f"[LLMFilterTool] Batched answer decided {len(decisions)}/{count} chunks, the rest are filtered one by one.")
+        return [
+            f"<think>{decisions[i][1]}</think>\n<decision>{decisions[i][0]}</decision>" if i in decisions else None
+            for i in range(count)
+        ]
+
+    def run_batch(self, chunk_texts: list[str]) -> list[str]:
+        """
+        Filter several chunks with one prompt. Chunks the answer does not decide cleanly are re-run with `run`.
+        Responses are returned in the order of `chunk_texts`.
+        """
+        if len(chunk_texts) == 1:
+            return [self.run(chunk_texts[0])]
+        response = self.llm_client.run(self.build_batch_prompt(chunk_texts)) or ""
+        responses = self._split_batch_response(response, len(chunk_texts))
+        return [r if r is not None else self.run(chunk_text) for r, chunk_text in zip(responses, chunk_texts)]
+
+    async def arun_batch(self, chunk_texts: list[str], timeout: float = DEFAULT_LLM_TIMEOUT) -> list[str | None]:
+        """
+        `run_batch` without blocking the event loop and without the fallback: undecided chunks come back as None.
+        `timeout` applies to the whole batched request.
+        """
+        if len(chunk_texts) == 1:
+            return [await self.arun(chunk_texts[0], timeout=timeout)]
+        response = await self.arun_prompt(self.build_batch_prompt(chunk_texts), timeout=timeout)
+        if not response:
+            return [None] * len(chunk_texts)
+        return self._split_batch_response(response, len(chunk_texts))
+
+    async def run_many(
+            self,
+            chunk_texts: list[str],
+            max_concurrency: int = DEFAULT_LLM_CONCURRENCY,
+            timeout: float = DEFAULT_LLM_TIMEOUT,
+            semaphore: asyncio.Semaphore | None = None,
+            batch_size: int = DEFAULT_LLM_BATCH_SIZE,
+            batch_timeout: float = DEFAULT_LLM_BATCH_TIMEOUT
+        ) -> list[str]:
+        """
+        Filter several chunks concurrently, at most `max_concurrency` requests at a time
+        (or as many as `semaphore` allows, when the caller shares one). Responses are returned in the order of `chunk_texts`.
+        With `batch_size` > 1, chunks are packed into batched prompts (see `pack_batches`), each given `batch_timeout`;
+        chunks a batched answer leaves undecided (or a timed-out batch) are sent again on their own.
+        """
+        semaphore = semaphore or asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run_one(chunk_text: str) -> str:
+            async with semaphore:
+                return await self.arun(chunk_text, timeout=timeout)
+
+        if batch_size <= 1:
+            return await asyncio.gather(*(run_one(chunk_text) for chunk_text in chunk_texts))
+
+        async def run_packed(indices: list[int]) -> list[str]:
+            texts = [chunk_texts[i] for i in indices]
+            async with semaphore:
+                responses = await self.arun_batch(texts, timeout=batch_timeout)
+            # the fallbacks take their own slots, after the batched request has released its one
+            fallbacks = iter(await asyncio.gather(*(run_one(text) for text, r in zip(texts, responses) if r is None)))
+            return [r if r is not None else next(fallbacks) for r in responses]
+
+        batches = self.pack_batches(chunk_texts, batch_size)
+        logger.info(f"[LLMFilterTool] Packed {len(chunk_texts)} chunks into {len(batches)} prompts.")
+        results = await asyncio.gather(*(run_packed(indices) for indices in batches))
+        responses = [""] * len(chunk_texts)
+        for indices, batch_responses in zip(batches, results):
+            for i, response in zip(indices, batch_responses):
+                responses[i] = response
+        return responses
+
     def extract_decision(self, text: str) -> str:
         """
         Returns the final decision (KEEP or DROP), optionally sanitized.
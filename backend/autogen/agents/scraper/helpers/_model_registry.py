@@ -0,0 +1,121 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+ONNX_QUANTIZATION_CONFIG = "avx2"   # int8 dynamic quantization preset used when exporting locally
+DEFAULT_ONNX_EXPORT_DIR = os.getenv("TRAVELAGENT_ONNX_EXPORT_DIR", "log/onnx_models")
+
+
+def _load_sentence_transformer(model_name: str, backend: str = "torch", onnx_file: str | None = None, **kwargs):
+    # imported lazily so processes that never embed anything do not pay for torch / sentence-transformers
+    from sentence_transformers import SentenceTransformer
+    if backend != "onnx":
+        return SentenceTransformer(model_name, **kwargs)
+
+    try:
+        # quantized exports published with the model on the Hub
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": onnx_file}, **kwargs)
+    except Exception as e:
+        logger.warning(f"[ModelRegistry] No prebuilt {onnx_file} for {model_name} ({e}), exporting a quantized ONNX model locally.")
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    export_dir = os.path.join(DEFAULT_ONNX_EXPORT_DIR, model_name.replace("/", "_"))
+    quantized_file = f"model_quint8_{ONNX_QUANTIZATION_CONFIG}.onnx"   # name the avx2 preset (unsigned int8 weights) is saved under
+    if not os.path.exists(os.path.join(export_dir, "onnx", quantized_file)):
+        SentenceTransformer(model_name, backend="onnx", **kwargs).save_pretrained(export_dir)
+        export_dynamic_quantized_onnx_model(SentenceTransformer(export_dir, backend="onnx"), ONNX_QUANTIZATION_CONFIG, export_dir)
+    return SentenceTransformer(export_dir, backend="onnx", model_kwargs={"file_name": f"onnx/{quantized_file}"}, **kwargs)
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe registry of loaded models.
+    `acquire` loads a model on first use (concurrent callers wait for the same load) and counts references;
+    `release` drops a reference and unloads the model when nobody uses it anymore.
+    `warm_up` loads a model ahead of time and pins it, so it stays loaded between users.
+    Models are keyed by name plus the keyword arguments they are loaded with.
+    """
+
+    def __init__(self, loader=_load_sentence_transformer):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries: dict[tuple, dict] = {}   # key -> {"model", "refs", "pinned", "lock", "load_seconds"}
+
+    @staticmethod
+    def _key(model_name: str, kwargs: dict) -> tuple:
+        return (model_name, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+    def _claim(self, key: tuple, pin: bool = False) -> dict:
+        # the reference (or pin) is taken before loading, so a concurrent release cannot drop the entry mid-load
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = {"model": None, "refs": 0, "pinned": False, "lock": threading.Lock(), "load_seconds": None}
+            entry = self._entries[key]
+            if pin:
+                entry["pinned"] = True
+            else:
+                entry["refs"] += 1
+            return entry
+
+    def _load(self, entry: dict, model_name: str, kwargs: dict):
+        with entry["lock"]:
+            if entry["model"] is None:
+                start = time.perf_counter()
+                logger.info(f"[ModelRegistry] Loading {model_name}...")
+                entry["model"] = self._loader(model_name, **kwargs)
+                entry["load_seconds"] = round(time.perf_counter() - start, 2)
+                logger.info(f"[ModelRegistry] Loaded {model_name} in {entry['load_seconds']} seconds.")
+        return entry["model"]
+
+    def acquire(self, model_name: str, **kwargs):
+        """Return the shared model, loading it if needed; pair every call with `release`."""
+        entry = self._claim(self._key(model_name, kwargs))
+        try:
+            return self._load(entry, model_name, kwargs)
+        except Exception:
+            self.release(model_name, **kwargs)
+            raise
+
+    def release(self, model_name: str, **kwargs) -> None:
+        key = self._key(model_name, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["refs"] <= 0:
+                return
+            entry["refs"] -= 1
+            if entry["refs"] == 0 and not entry["pinned"]:
+                logger.info(f"[ModelRegistry] Unloading {model_name} (no more users).")
+                del self._entries[key]
+
+    def warm_up(self, model_name: str, **kwargs):
+        """Load `model_name` now and keep it loaded until `unpin`."""
+        entry = self._claim(self._key(model_name, kwargs), pin=True)
+        return self._load(entry, model_name, kwargs)
+
+    def unpin(self, model_name: str, **kwargs) -> None:
+        key = self._key(model_name, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["pinned"] = False
+            if entry["refs"] == 0:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                key[0]: {"refs": entry["refs"], "pinned": entry["pinned"], "loaded": entry["model"] is not None, "load_seconds": entry["load_seconds"]}
+                for key, entry in self._entries.items()
+            }
+
+
+_shared_registry = ModelRegistry()
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    return _shared_registry
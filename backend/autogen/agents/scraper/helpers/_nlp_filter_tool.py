@@ -1,7 +1,13 @@
+import os
 import re
 from typing import Dict, Any, List, Optional, Tuple
-from sentence_transformers import SentenceTransformer, util
-from dateparser.search import search_dates
+import numpy as np
+from sentence_transformers import util
+
+from ._recency import years_in_text, metadata_year
+from ._keyword_matcher import KeywordMatcher
+from ._embedding_cache import get_embedding_cache
+from ._model_registry import get_model_registry
 
 # -------- thresholds / policy --------
 ACCEPTED_YEAR = 2022
@@ -9,12 +15,21 @@ PREFERENCE_THRESHOLD = 1
 RELEVANCE_THRESHOLD = 0.45
 RECENCY_RELEVANCE_OVERRIDE = 0.56   # if no dates, allow relevance ≥ this to satisfy recency
 PREF_BYPASS_RELEVANCE = 0.56        # allow KEEP with high relevance even if prefs=0
+DEFAULT_HYBRID_BAND = 0.05          # "hybrid" filtering: relevance within ± this of RELEVANCE_THRESHOLD is left to the LLM
 
 # Dynamic anchor boost (no hardcoded locations)
 ANCHOR_BOOST_PER_MATCH = 0.02       # small bump per matched intent anchor
 MAX_ANCHOR_BOOST = 0.06             # cap total anchor boost
 MAX_INTENT_ANCHORS = 12             # limit to reduce noise
 
+SIMILARITY_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BACKENDS = ("torch", "onnx")
+DEFAULT_EMBEDDING_BACKEND = os.getenv("TRAVELAGENT_EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_FILE = "onnx/model_quint8_avx2.onnx"   # int8 dynamic quantization, fastest on x86 CPUs
+SUBCHUNK_POOLING = ("max", "topk_mean")   # how sub-chunk scores are pooled into a document relevance
+DEFAULT_SUBCHUNK_TOP_K = 3
+EMBEDDING_BATCH_SIZE = 32           # chunks per encode batch (sentence-transformers sorts them by length)
+
 SUSPICIOUS_PATTERNS = ["fake", "scam", "hoax", "misleading", "false info", "clickbait"]
 BLACKLISTED_WORDS = ["violence", "scam", "adult-only", "nudity", "political", "hate", "terror", "religious extremism"]
 
@@ -26,20 +41,74 @@ _STOPWORDS = {
     "you","your","yours","our","ours","their","theirs"
 }
 
+class IntentContext:
+    """
+    What the filter derives from one user query + the profile, built once per query (so once per round):
+    the fused intent text, its anchors (and a matcher for them) and its embedding.
+    """
+    def __init__(self, user_query: str, fused_text: str, anchors: List[str], query_embedding):
+        self.user_query = user_query
+        self.fused_text = fused_text
+        self.anchors = anchors
+        self.query_embedding = query_embedding
+        self._anchor_matcher = KeywordMatcher({"anchors": anchors})
+
+    def matched_anchors(self, chunks: List[str]) -> List[List[str]]:
+        """Anchors found in each chunk (substring match, anchor order), all chunks in one regex pass."""
+        return [hits["anchors"] for hits in self._anchor_matcher.scan_many(chunks)]
+
+
 class NLPFilterTool:
     """
     Explainable filter with dynamic anchor boosting (no hardcoded locations).
     Policy:
       KEEP requires ACCURACY_OK ∧ SAFETY_OK ∧ RECENCY_OK ∧ RELEVANCE_OK ∧ PREFERENCE_SUFFICIENT,
       where PREFERENCE_SUFFICIENT := (preference_score ≥ 1) OR (relevance ≥ PREF_BYPASS_RELEVANCE).
+    Embeddings come from all-MiniLM-L6-v2 on PyTorch, or from its int8-quantized ONNX export with embedding_backend="onnx".
     """
-    def __init__(self, user_profile: dict):
-        self.similarity_model = "all-MiniLM-L6-v2"
+    def __init__(self, user_profile: dict, use_embedding_cache: bool = True, embedding_backend: str = DEFAULT_EMBEDDING_BACKEND):
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{embedding_backend}', expected one of {EMBEDDING_BACKENDS}")
+        self.similarity_model = SIMILARITY_MODEL
         self.similarity_metric = "cosine_similarity"
-        self.embedder = SentenceTransformer(self.similarity_model)
+        self.embedding_backend = embedding_backend
+        self._embedder = None  # shared model, acquired from the registry on first use
+        # quantized vectors differ slightly from the torch ones, so each backend gets its own cache
+        cache_name = self.similarity_model if embedding_backend == "torch" else f"{self.similarity_model}-{os.path.basename(ONNX_MODEL_FILE)}"
+        self.embedding_cache = get_embedding_cache(cache_name) if use_embedding_cache else None
         self.user_profile_keywords = self.extract_keywords_from_profile(user_profile)
         self.user_profile = user_profile
         # cache intent anchors built from query+profile per call; not stored globally
+        self._intent_context: Optional[IntentContext] = None  # context of the last query (one per round)
+        # preference (whole word), blacklist and suspicious terms matched in one pass
+        self._keyword_matcher = KeywordMatcher(
+            {"preference": self.user_profile_keywords, "blacklist": BLACKLISTED_WORDS, "suspicious": SUSPICIOUS_PATTERNS},
+            whole_word={"preference"},
+        )
+        self._last_keyword_hits: Tuple[Optional[str], Dict[str, List[str]]] = (None, {})  # (chunk, hits)
+
+    @staticmethod
+    def _model_kwargs(embedding_backend: str) -> dict:
+        if embedding_backend == "onnx":
+            return {"backend": "onnx", "onnx_file": ONNX_MODEL_FILE}
+        return {}
+
+    @staticmethod
+    def warm_up(embedding_backend: str = DEFAULT_EMBEDDING_BACKEND) -> None:
+        """Load the similarity model into the shared registry ahead of the first request, and keep it loaded."""
+        get_model_registry().warm_up(SIMILARITY_MODEL, **NLPFilterTool._model_kwargs(embedding_backend))
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = get_model_registry().acquire(self.similarity_model, **self._model_kwargs(self.embedding_backend))
+        return self._embedder
+
+    def close(self) -> None:
+        """Release this tool's reference to the shared similarity model."""
+        if self._embedder is not None:
+            self._embedder = None
+            get_model_registry().release(self.similarity_model, **self._model_kwargs(self.embedding_backend))
 
     # ----------------- feature extraction -----------------
 
@@ -60,32 +129,26 @@ class NLPFilterTool:
         # compact the profile keyword list to avoid ballooning the fused query
         return " ".join(self.user_profile_keywords[:50])
 
+    def keyword_hits(self, chunk) -> Dict[str, List[str]]:
+        """Preference, blacklist and suspicious hits of `chunk` (one scan, reused by the three checks below)."""
+        last_chunk, last_hits = self._last_keyword_hits
+        if last_chunk != chunk:
+            last_hits = self._keyword_matcher.scan(chunk)
+            self._last_keyword_hits = (chunk, last_hits)
+        return last_hits
+
     def is_factually_suspicious(self, chunk):
-        chunk_lc = chunk.lower()
-        hits = [t for t in SUSPICIOUS_PATTERNS if t in chunk_lc]
+        hits = self.keyword_hits(chunk)["suspicious"]
         return len(hits) > 0, hits
 
     def is_up_to_date(self, chunk, metadata=None):
-        years_found = []
-        try:
-            found = search_dates(chunk)
-            if found:
-                for _, date in found:
-                    years_found.append(date.year)
-        except Exception:
-            pass
-
-        meta_year = None
-        if metadata and "last_updated" in metadata:
-            try:
-                meta_year = int(str(metadata["last_updated"])[:4])
-            except Exception:
-                meta_year = None
+        years_found = years_in_text(chunk)
+        meta_year = metadata_year(metadata)
 
         up_to_date_text = any(y >= ACCEPTED_YEAR for y in years_found)
         up_to_date_meta = (meta_year is not None and meta_year >= ACCEPTED_YEAR)
         return (up_to_date_text or up_to_date_meta), {
-            "years_found": sorted(set(y for y in years_found if y is not None)),
+            "years_found": years_found,
             "meta_last_updated_year": meta_year
         }
 
@@ -95,15 +158,52 @@ class NLPFilterTool:
         profile_text = self._compact_profile_text()
         return f"{user_query} | profile: {profile_text}" if profile_text else user_query
 
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeddings (float32, one row per text). Texts found in the embedding cache are not re-encoded;
+        the misses are encoded in one batch and written back to the cache.
+        """
+        if self.embedding_cache is None:
+            return self.embedder.encode(texts, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True).astype(np.float32)
+
+        cached = self.embedding_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = self.embedder.encode(missing_texts, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True).astype(np.float32)
+            self.embedding_cache.put_many(missing_texts, encoded)
+            for i, vector in zip(missing, encoded):
+                cached[i] = vector
+        return np.stack(cached)
+
+    def intent_context(self, user_query: str) -> IntentContext:
+        """The IntentContext for `user_query`; the query is the same for a whole round, so the last one is reused."""
+        context = self._intent_context
+        if context is None or context.user_query != user_query:
+            fused_text = self._fused_intent_text(user_query)
+            context = IntentContext(user_query, fused_text, self._extract_anchors(fused_text), self.encode([fused_text]))
+            self._intent_context = context
+        return context
+
     def semantic_relevance(self, chunk: str, user_query: str) -> float:
         """
         Cosine similarity between chunk and fused intent (query + profile keywords).
         """
-        fused_query = self._fused_intent_text(user_query)
-        chunk_embedding = self.embedder.encode(chunk, convert_to_tensor=True)
-        query_embedding = self.embedder.encode(fused_query, convert_to_tensor=True)
+        chunk_embedding = self.encode([chunk])
+        query_embedding = self.intent_context(user_query).query_embedding
         return float(util.cos_sim(query_embedding, chunk_embedding)[0][0])
 
+    def semantic_relevance_batch(self, chunks: List[str], user_query: str) -> List[float]:
+        """
+        Batched `semantic_relevance`: the query is encoded once, all uncached chunks in one length-sorted batch,
+        and the cosine scores come from a single (1 x N) similarity matrix.
+        """
+        if not chunks:
+            return []
+        query_embedding = self.intent_context(user_query).query_embedding
+        chunk_embeddings = self.encode(chunks)
+        return util.cos_sim(query_embedding, chunk_embeddings)[0].tolist()
+
     def _extract_anchors(self, text: str) -> List[str]:
         """
         Extract dynamic anchors from text:
@@ -135,14 +235,11 @@ class NLPFilterTool:
                 ordered.append(a)
         return ordered[:MAX_INTENT_ANCHORS]
 
-    def _apply_dynamic_anchor_boost(self, relevance: float, chunk_text: str, intent_text: str) -> Tuple[float, Dict[str, Any]]:
+    def _apply_dynamic_anchor_boost(self, relevance: float, intent_anchors: List[str], matches: List[str]) -> Tuple[float, Dict[str, Any]]:
         """
-        Add a small, capped boost per intent anchor found in the chunk.
+        Add a small, capped boost per intent anchor found in the chunk (`matches`, see IntentContext.matched_anchors).
         No penalties, no hardcoded locations.
         """
-        chunk_lc = chunk_text.lower()
-        intent_anchors = self._extract_anchors(intent_text)
-        matches = [a for a in intent_anchors if a in chunk_lc]
         boost = min(len(matches) * ANCHOR_BOOST_PER_MATCH, MAX_ANCHOR_BOOST)
         adjusted = max(-1.0, min(1.0, relevance + boost))
         info = {
@@ -157,16 +254,11 @@ class NLPFilterTool:
     # ----------------- safety & prefs -----------------
 
     def preference_match_score(self, chunk):
-        chunk_lc = chunk.lower()
-        hits = []
-        for kw in self.user_profile_keywords:
-            if re.search(rf"\b{re.escape(kw)}\b", chunk_lc):
-                hits.append(kw)
+        hits = self.keyword_hits(chunk)["preference"]
         return len(hits), hits
 
     def is_contextually_safe(self, chunk):
-        chunk_lc = chunk.lower()
-        hits = [t for t in BLACKLISTED_WORDS if t in chunk_lc]
+        hits = self.keyword_hits(chunk)["blacklist"]
         return len(hits) == 0, hits
 
     # ----------------- explainability helpers -----------------
@@ -210,6 +302,100 @@ class NLPFilterTool:
     # ----------------- main -----------------
 
     def filter_chunk(self, chunk, user_query, metadata: Optional[Dict[str, Any]] = None):
+        relevance_raw = self.semantic_relevance(chunk, user_query)
+        intent = self.intent_context(user_query)
+        return self._decide(chunk, metadata, relevance_raw, intent, intent.matched_anchors([chunk])[0])
+
+    def filter_chunks(self, chunks: List[str], user_query: str, metadatas: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[Dict[str, Any]]:
+        """
+        Batch version of `filter_chunk` for chunks sharing one user query.
+        Embeddings are computed in one batch; each chunk gets the same decision and scorecard as `filter_chunk`.
+        """
+        metadatas = metadatas if metadatas is not None else [None] * len(chunks)
+        relevances = self.semantic_relevance_batch(chunks, user_query)
+        intent = self.intent_context(user_query)
+        anchor_matches = intent.matched_anchors(chunks)
+        return [
+            self._decide(chunk, metadata, relevance_raw, intent, matches)
+            for chunk, metadata, relevance_raw, matches in zip(chunks, metadatas, relevances, anchor_matches)
+        ]
+
+    @staticmethod
+    def _pool(scores: List[float], pooling: str, top_k: int) -> float:
+        if pooling == "topk_mean":
+            top = sorted(scores, reverse=True)[:max(1, top_k)]
+            return sum(top) / len(top)
+        return max(scores)
+
+    def filter_documents(
+            self,
+            documents: List[str],
+            sub_chunks: List[List[str]],
+            user_query: str,
+            metadatas: Optional[List[Optional[Dict[str, Any]]]] = None,
+            pooling: str = "max",
+            top_k: int = DEFAULT_SUBCHUNK_TOP_K,
+        ) -> List[Dict[str, Any]]:
+        """
+        Sub-chunk scoring: the relevance of each document is pooled (max, or mean of the top-k) over the scores of
+        its sub-chunks, so long pages are no longer judged on the first ~256 tokens the model sees.
+        Every sub-chunk of every document is embedded in one batch; a document without sub-chunks is scored whole.
+        Keyword, safety and recency rules still look at the whole document. A KEEP result lists the sub-chunks
+        worth keeping on their own in `kept_subchunks` (those above RELEVANCE_THRESHOLD, at least the best one).
+        """
+        if pooling not in SUBCHUNK_POOLING:
+            raise ValueError(f"Unknown pooling '{pooling}', expected one of {SUBCHUNK_POOLING}")
+        metadatas = metadatas if metadatas is not None else [None] * len(documents)
+        units = [subs if subs else [doc] for doc, subs in zip(documents, sub_chunks)]
+
+        flat = [text for texts in units for text in texts]
+        flat_scores = self.semantic_relevance_batch(flat, user_query)
+        intent = self.intent_context(user_query)
+        anchor_matches = intent.matched_anchors(documents)
+
+        results = []
+        offset = 0
+        for doc, subs, texts, metadata, matches in zip(documents, sub_chunks, units, metadatas, anchor_matches):
+            scores = flat_scores[offset:offset + len(texts)]
+            offset += len(texts)
+            result = self._decide(doc, metadata, self._pool(scores, pooling, top_k), intent, matches)
+
+            best = max(range(len(scores)), key=lambda i: scores[i])
+            subchunk_info = {
+                "pooling": pooling if subs else "whole_document",
+                "top_k": top_k if pooling == "topk_mean" else None,
+                "scores": [round(score, 4) for score in scores],
+                "best_index": best,
+            }
+            result["evidence"]["subchunk_relevance"] = subchunk_info
+            result["scorecard"]["subchunk_relevance"] = subchunk_info
+            if result["final_decision"] == "KEEP" and subs:
+                result["kept_subchunks"] = self._kept_subchunk_indices(scores)
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _kept_subchunk_indices(scores: List[float]) -> List[int]:
+        best = max(range(len(scores)), key=lambda i: scores[i])
+        return [i for i, score in enumerate(scores) if score > RELEVANCE_THRESHOLD] or [best]
+
+    def kept_subchunks(self, sub_chunks: List[str], user_query: str) -> List[int]:
+        """Indices of the sub-chunks of a KEEP document worth keeping on their own (same rule as `filter_documents`)."""
+        if not sub_chunks:
+            return []
+        return self._kept_subchunk_indices(self.semantic_relevance_batch(sub_chunks, user_query))
+
+    @staticmethod
+    def is_borderline(result: Dict[str, Any], band: float = DEFAULT_HYBRID_BAND) -> bool:
+        """
+        True when the relevance margin is too thin to trust the NLP decision: relevance is within `band`
+        of RELEVANCE_THRESHOLD and the chunk passed the accuracy and safety checks (which are a clear DROP otherwise).
+        """
+        if not (result["accuracy"] and result["is_safe"]):
+            return False
+        return abs(result["relevance_score"] - RELEVANCE_THRESHOLD) <= band
+
+    def _decide(self, chunk, metadata: Optional[Dict[str, Any]], relevance_raw: float, intent: IntentContext, anchor_matches: List[str]):
         # base signals
         suspicious, suspicious_hits = self.is_factually_suspicious(chunk)
         accuracy_ok = not suspicious
@@ -217,9 +403,7 @@ class NLPFilterTool:
         up_to_date, date_ev = self.is_up_to_date(chunk, metadata)
 
         # fused relevance + dynamic anchor boost
-        intent_text = self._fused_intent_text(user_query)
-        relevance_raw = self.semantic_relevance(chunk, user_query)
-        relevance_score, anchor_info = self._apply_dynamic_anchor_boost(relevance_raw, chunk, intent_text)
+        relevance_score, anchor_info = self._apply_dynamic_anchor_boost(relevance_raw, intent.anchors, anchor_matches)
 
         preference_score, pref_hits = self.preference_match_score(chunk)
         is_safe, unsafe_hits = self.is_contextually_safe(chunk)
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+import tempfile
+import threading
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv("TRAVELAGENT_PAGE_CACHE_DIR", "log/page_cache")
+DEFAULT_MAX_CACHE_BYTES = 512 * 1024 * 1024   # total size of compressed pages kept on disk
+DEFAULT_TTL_SECONDS = 24 * 3600               # fallback TTL when no domain rule matches
+
+# Per-domain TTLs (suffix match on the host). Slow-changing reference sites get longer TTLs.
+DOMAIN_TTL_SECONDS = {
+    "wikivoyage.org": 7 * 24 * 3600,
+    "wikipedia.org": 7 * 24 * 3600,
+    "wikitravel.org": 7 * 24 * 3600,
+    "japan-guide.com": 3 * 24 * 3600,
+    "lonelyplanet.com": 3 * 24 * 3600,
+    "tripadvisor.com": 12 * 3600,
+}
+
+# Query parameters that never change the page content
+TRACKING_PARAMS_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "_ga", "igshid"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form used as the cache key: lowercase scheme/host, no default port,
+    no fragment, no tracking parameters, sorted query, "/" for an empty path.
+    """
+    parsed = urlparse(url.strip())
+    scheme = (parsed.scheme or "http").lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PARAMS_PREFIXES)
+    ]
+    return urlunparse((scheme, host, parsed.path or "/", "", urlencode(sorted(query)), ""))
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Write `data` to a temp file next to `path`, then move it into place: readers see the old file or the new one."""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp", delete=False) as f:
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+class PageCache:
+    """
+    Content-addressed on-disk cache for scraped pages.
+    Entries are keyed by sha256(canonical URL) and stored as <key>.html.z (zlib-compressed HTML)
+    plus <key>.json (extracted metadata, clean content, chunks, ETag/Last-Modified, timestamps).
+    Both are written atomically, the JSON last, so a reader never pairs a partial page with its metadata.
+    Freshness follows per-domain TTLs; stale entries can be revalidated with conditional requests.
+    Total compressed size is capped with LRU eviction. Hit/miss counters are exposed via `stats()`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+        default_ttl: float = DEFAULT_TTL_SECONDS,
+        domain_ttls: dict | None = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttls = DOMAIN_TTL_SECONDS if domain_ttls is None else domain_ttls
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] = {}   # key -> {"size": int, "last_access": float}
+        self._total_bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ----------------- paths & index -----------------
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".html.z", base + ".json"
+
+    def _load_index(self) -> None:
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".html.z"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = name[: -len(".html.z")]
+                self._index[key] = {"size": stat.st_size, "last_access": stat.st_atime}
+                self._total_bytes += stat.st_size
+
+    def ttl_for(self, url: str) -> float:
+        host = (urlparse(url).hostname or "").lower()
+        for domain, ttl in self.domain_ttls.items():
+            if host == domain or host.endswith("." + domain):
+                return ttl
+        return self.default_ttl
+
+    # ----------------- read / write -----------------
+
+    def get(self, url: str) -> dict | None:
+        """
+        Return the cached entry for `url` (with "html" decompressed and "fresh" set), or None on a miss.
+        A stale entry is still returned so the caller can revalidate it.
+        """
+        key = self.key_for(url)
+        html_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(html_path, "rb") as f:
+                entry["html"] = zlib.decompress(f.read()).decode("utf-8")
+        except (OSError, ValueError, zlib.error):
+            with self._lock:
+                self.counters["misses"] += 1
+            return None
+
+        entry["fresh"] = (time.time() - entry.get("fetched_at", 0)) < self.ttl_for(url)
+        with self._lock:
+            self.counters["hits" if entry["fresh"] else "stale"] += 1
+            if key in self._index:
+                self._index[key]["last_access"] = time.time()
+        return entry
+
+    def put(self, url: str, html: str, metadata: dict, clean_content: str, chunks: list, etag: str | None = None, last_modified: str | None = None, chunking: dict | None = None) -> None:
+        """
+        Store a scraped page; evicts least recently used pages when over `max_bytes`.
+        `etag` / `last_modified` must describe `html` itself (a static response body), since a 304 revalidation serves it again.
+        """
+        if not html:
+            return
+        key = self.key_for(url)
+        html_path, meta_path = self._paths(key)
+        compressed = zlib.compress(html.encode("utf-8"), 6)
+        entry = {
+            "url": canonicalize_url(url),
+            "metadata": metadata,
+            "clean_content": clean_content,
+            "chunks": chunks,
+            "chunking": chunking,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        try:
+            os.makedirs(os.path.dirname(html_path), exist_ok=True)
+            _atomic_write(html_path, compressed)
+            _atomic_write(meta_path, json.dumps(entry, default=str).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"[PageCache] Failed to store {url}: {e}")
+            return
+
+        with self._lock:
+            previous = self._index.get(key)
+            if previous:
+                self._total_bytes -= previous["size"]
+            self._index[key] = {"size": len(compressed), "last_access": time.time()}
+            self._total_bytes += len(compressed)
+            self.counters["stores"] += 1
+            self._evict_locked()
+
+    def touch(self, url: str) -> None:
+        """Mark a stale entry as fresh again after a 304 Not Modified revalidation."""
+        key = self.key_for(url)
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["fetched_at"] = time.time()
+            _atomic_write(meta_path, json.dumps(entry, default=str).encode("utf-8"))
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self.counters["revalidated"] += 1
+
+    def _evict_locked(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, info in sorted(self._index.items(), key=lambda kv: kv[1]["last_access"]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes -= info["size"]
+            del self._index[key]
+            self.counters["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"] + self.counters["stale"]
+            return {
+                **self.counters,
+                "entries": len(self._index),
+                "total_bytes": self._total_bytes,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_shared_cache: PageCache | None = None
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide page cache, creating it on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = PageCache()
+    return _shared_cache
@@ -0,0 +1,58 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from dateparser.search import search_dates
+
+YEARS_CACHE_SIZE = 4096       # texts whose years are remembered (by content hash)
+
+_cache: OrderedDict[str, list[int]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _search_years(text: str) -> list[int]:
+    # search_dates over the whole text, language detected: relative expressions ("two hours before")
+    # and month ranges depend on the surrounding text, so any shortcut here changes the years found.
+    try:
+        found = search_dates(text)
+    except Exception:
+        return []
+    if not found:
+        return []
+    return sorted(set(date.year for _, date in found if date is not None))
+
+
+def years_in_text(text: str) -> list[int]:
+    """
+    Sorted distinct years of the dates search_dates finds in `text`.
+    Results are cached by content hash, so a chunk seen again (another round, a fallback attempt,
+    a repeated page) is not parsed twice.
+    """
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return list(_cache[key])
+
+    years = _search_years(text)
+
+    with _cache_lock:
+        _cache[key] = years
+        while len(_cache) > YEARS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return list(years)
+
+
+def metadata_year(metadata: dict | None) -> int | None:
+    """Year of the page's last update: the explicit `last_updated`, else the trafilatura `date`."""
+    if not metadata:
+        return None
+    for field in ("last_updated", "date"):
+        value = metadata.get(field)
+        if not value:
+            continue
+        try:
+            return int(str(value)[:4])
+        except (TypeError, ValueError):
+            continue
+    return None
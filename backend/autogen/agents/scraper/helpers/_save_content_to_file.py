@@ -1,7 +1,17 @@
 import os
 import json
+import asyncio
+import logging
+from typing import AsyncGenerator
 
-from ._scrape_content_from_url import scrape_and_filter
+from ._scrape_content_from_url import scrape_and_filter, fetch_time_budget
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SCRAPE_WORKERS = 5      # number of URLs scraped at the same time
+DEFAULT_PER_URL_TIMEOUT = None      # seconds allowed for a single URL; None derives it from the fetch timeouts
+PER_URL_TIMEOUT_MARGIN = 15.0       # seconds on top of the fetch time budget (waiting for a browser page, extraction)
+DEFAULT_OVERALL_TIMEOUT = 120.0     # seconds allowed for the whole batch of sources
 
 def ensure_directory_exists(file_path: str):
     """
@@ -44,33 +54,119 @@ def write_content_to_file(content, filename: str):
             json.dump(content, f, indent=2)
     print(f"Content written to {filename}")
 
-async def save_sources_to_file(query: str, sources: list, log_path: str) -> list:
-    """Save the sources to a text file."""
-    results = []
-
-    for i, source in enumerate(sources):
-        current_chunk = {
-            "query": query,
-            "title": source['metadata']['title'],
-            "url": source['metadata']['url'],
-            "metadata": {},
-            "raw_html": "",
-            "clean_content": "",
-            "chunks": []
-        }
-       
-        scraped_result = await scrape_and_filter(url=source['metadata']['url'], log_path=log_path)
-        current_chunk["metadata"] = scraped_result['metadata']
-        current_chunk["raw_html"] = scraped_result['raw_html']
-        current_chunk["clean_content"] = scraped_result['clean_content']
-
-        c = []
-        for i, chunk in enumerate(scraped_result["chunks"]):
-            c.append(chunk)
-
-        current_chunk["chunks"].append(c)
-        results.append(current_chunk)
-        
+def _per_url_deadline(per_url_timeout: float | None, render_mode: str) -> float:
+    """`per_url_timeout`, or by default enough for the static attempt plus a render in `render_mode` to time out on their own."""
+    if per_url_timeout is not None:
+        return per_url_timeout
+    return fetch_time_budget(render_mode) + PER_URL_TIMEOUT_MARGIN
+
+def _empty_chunk(query: str, source: dict) -> dict:
+    return {
+        "query": query,
+        "title": source['metadata']['title'],
+        "url": source['metadata']['url'],
+        "metadata": {},
+        "raw_html": "",
+        "clean_content": "",
+        "chunks": []
+    }
+
+async def _scrape_source(query: str, source: dict, log_path: str, semaphore: asyncio.Semaphore, per_url_timeout: float, render_mode: str, chunking: dict | None = None) -> dict:
+    """Scrape a single source under the worker limit and the per-URL deadline."""
+    current_chunk = _empty_chunk(query, source)
+    url = source['metadata']['url']
+
+    async with semaphore:
+        try:
+            scraped_result = await asyncio.wait_for(scrape_and_filter(url=url, log_path=log_path, render_mode=render_mode, chunking=chunking), timeout=per_url_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[save_sources_to_file] Scraping {url} exceeded {per_url_timeout}s, skipping.")
+            return current_chunk
+        except Exception as e:
+            logger.warning(f"[save_sources_to_file] Scraping {url} failed: {e}")
+            return current_chunk
+
+    current_chunk["metadata"] = scraped_result['metadata']
+    current_chunk["raw_html"] = scraped_result['raw_html']
+    current_chunk["clean_content"] = scraped_result['clean_content']
+
+    c = []
+    for i, chunk in enumerate(scraped_result["chunks"]):
+        c.append(chunk)
+
+    current_chunk["chunks"].append(c)
+    return current_chunk
+
+async def iter_scraped_sources(
+    query: str,
+    sources: list,
+    log_path: str,
+    max_workers: int = DEFAULT_MAX_SCRAPE_WORKERS,
+    per_url_timeout: float | None = DEFAULT_PER_URL_TIMEOUT,
+    overall_timeout: float | None = DEFAULT_OVERALL_TIMEOUT,
+    render_mode: str = "light",
+    chunking: dict | None = None,
+) -> AsyncGenerator[tuple[int, dict], None]:
+    """
+    Scrape the sources concurrently (at most `max_workers` at a time) and yield `(source_index, document)`
+    as soon as each one is extracted. Stops at the overall deadline; closing the generator cancels
+    whatever is still running.
+    """
+    if not sources:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+    per_url_timeout = _per_url_deadline(per_url_timeout, render_mode)
+    tasks = {
+        asyncio.create_task(_scrape_source(query, source, log_path, semaphore, per_url_timeout, render_mode, chunking)): i
+        for i, source in enumerate(sources)
+    }
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + overall_timeout if overall_timeout else None
+    pending = set(tasks)
+
+    try:
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.warning(f"[save_sources_to_file] Overall deadline of {overall_timeout}s reached, cancelling {len(pending)} unfinished sources.")
+                break
+            for task in sorted(done, key=lambda t: tasks[t]):
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                yield tasks[task], task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+async def save_sources_to_file(
+    query: str,
+    sources: list,
+    log_path: str,
+    max_workers: int = DEFAULT_MAX_SCRAPE_WORKERS,
+    per_url_timeout: float | None = DEFAULT_PER_URL_TIMEOUT,
+    overall_timeout: float | None = DEFAULT_OVERALL_TIMEOUT,
+    render_mode: str = "light",
+    chunking: dict | None = None,
+) -> list:
+    """
+    Scrape the sources concurrently (at most `max_workers` at a time) and return them in source order.
+    A source that fails, or misses its per-URL or the overall deadline, comes back with empty content.
+    """
+    results = [_empty_chunk(query, source) for source in sources]
+
+    async for index, chunk in iter_scraped_sources(
+        query, sources, log_path,
+        max_workers=max_workers,
+        per_url_timeout=per_url_timeout,
+        overall_timeout=overall_timeout,
+        render_mode=render_mode,
+        chunking=chunking,
+    ):
+        results[index] = chunk
+
     # print(f"{len(results)}")
     return results
-
@@ -3,62 +3,135 @@ import os
 import json
 import asyncio
 import hashlib
+import httpx
 import logging
-import requests
 import trafilatura
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright
 from trafilatura.metadata import extract_metadata
 
+from ._http_client import get_fetch_client
+from ._browser_pool import get_browser_pool
+from ._page_cache import get_page_cache
+from ._extraction_executor import get_extraction_executor
+from ._chunker import chunk_text
+
 logger = logging.getLogger(__name__)
 
+# Resource types / hosts skipped in the "light" render mode (we only need the text DOM)
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet", "websocket", "manifest", "ping"}
+BLOCKED_HOST_KEYWORDS = (
+    "doubleclick", "googlesyndication", "googletagmanager", "google-analytics", "googleadservices",
+    "adservice", "adsystem", "adnxs", "facebook.net", "scorecardresearch", "hotjar", "segment.io",
+    "criteo", "taboola", "outbrain", "amazon-adsystem", "quantserve", "newrelic", "optimizely",
+)
+
+# Fetch timeouts (the per-URL deadline in _save_content_to_file is derived from them)
+STATIC_FETCH_TIMEOUT = 10           # seconds for the static request
+DYNAMIC_STEP_TIMEOUT_MS = 30_000    # each Playwright navigation / selector wait
+FULL_RENDER_DELAY_MS = 3000         # fixed wait for lazy JS in the "full" render mode
+
+# DOM-stability heuristic used instead of a fixed sleep
+DOM_STABILITY_POLL_MS = 250
+DOM_STABILITY_REQUIRED_POLLS = 2    # consecutive unchanged polls before the DOM counts as settled
+DOM_STABILITY_MAX_WAIT_MS = 3000    # never wait longer than the old fixed delay
+DOM_SIZE_SCRIPT = "() => document.body ? [document.body.innerText.length, document.getElementsByTagName('*').length] : [0, 0]"
+
 # ========== Basic Utilities ==========
 
-def fetch_static_html(url: str, timeout: int = 10) -> str:
-    """Fetch raw HTML with requests (static)."""
+async def fetch_static_page(url: str, timeout: int = STATIC_FETCH_TIMEOUT, headers: dict | None = None):
+    """Fetch a page through the shared async HTTP client; returns a FetchResult or None on transport errors."""
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; SmartScraper/1.0)"}
-        resp = requests.get(url, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        return resp.text
-    except requests.RequestException as e:
+        return await get_fetch_client().fetch(url, timeout=timeout, headers=headers)
+    except httpx.HTTPError as e:
         logger.info(f"[fetch_static_html] Error fetching {url}: {str(e)}")
+        return None
+
+
+async def fetch_static_html(url: str, timeout: int = STATIC_FETCH_TIMEOUT) -> str:
+    """Fetch raw HTML through the shared async HTTP client (static)."""
+    resp = await fetch_static_page(url, timeout=timeout)
+    if resp is None:
         return ""
+    if not resp.ok:
+        logger.info(f"[fetch_static_html] Error fetching {url}: HTTP {resp.status_code}")
+        return ""
+    return resp.text
+
+
+async def _block_heavy_resources(route) -> None:
+    """Abort requests for media/fonts/styles and known ad or analytics hosts."""
+    request = route.request
+    host = urlparse(request.url).netloc.lower()
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(k in host for k in BLOCKED_HOST_KEYWORDS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def wait_for_dom_stability(
+    page,
+    poll_ms: int = DOM_STABILITY_POLL_MS,
+    required_polls: int = DOM_STABILITY_REQUIRED_POLLS,
+    max_wait_ms: int = DOM_STABILITY_MAX_WAIT_MS,
+) -> bool:
+    """
+    Poll the body text length and element count until they stop changing
+    for `required_polls` polls in a row, or `max_wait_ms` passes. Returns True if the DOM settled.
+    """
+    last_size = None
+    stable_polls = 0
+    waited = 0
+    while waited < max_wait_ms:
+        try:
+            size = await page.evaluate(DOM_SIZE_SCRIPT)
+        except Exception:
+            size = None
+        if size is not None and size == last_size:
+            stable_polls += 1
+            if stable_polls >= required_polls:
+                return True
+        else:
+            stable_polls = 0
+        last_size = size
+        await page.wait_for_timeout(poll_ms)
+        waited += poll_ms
+    return False
 
 
 async def fetch_dynamic_html(
     url: str,
-    timeout: int = 30_000,
+    timeout: int = DYNAMIC_STEP_TIMEOUT_MS,
     wait_selector: str = "body",
     screenshot_path: str | None = None,
     debug: bool = False,
+    render_mode: str = "light",
 ) -> str:
-    """Fetch rendered HTML with Playwright (dynamic)."""
+    """
+    Fetch rendered HTML with a page leased from the shared Playwright browser pool (dynamic).
+    render_mode="light" blocks media/fonts/styles/ads, waits for domcontentloaded and a settled DOM;
+    render_mode="full" loads everything, waits for networkidle and a fixed 3s delay.
+    """
+    light = render_mode == "light"
 
     safe_name = hashlib.md5(url.encode()).hexdigest()
     base_dir = screenshot_path or "autogen/log"
     filename = os.path.join(base_dir, safe_name)
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/112.0.0.0 Safari/537.36"
-                )
-            )
-            page = await context.new_page()
-            logger.info(f"[fetch_dynamic_html] Navigating to: {url}")
-
-            # Try networkidle first
-            try:
-                await page.goto(url, wait_until="networkidle", timeout=timeout)
-            except Exception as e:
-                logger.warning(f"[fetch_dynamic_html] networkidle failed: {e}, retrying with domcontentloaded")
+        async with get_browser_pool().page() as page:
+            logger.info(f"[fetch_dynamic_html] Navigating to: {url} (render_mode={render_mode})")
+
+            if light:
+                await page.route("**/*", _block_heavy_resources)
                 await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            else:
+                # Try networkidle first
+                try:
+                    await page.goto(url, wait_until="networkidle", timeout=timeout)
+                except Exception as e:
+                    logger.warning(f"[fetch_dynamic_html] networkidle failed: {e}, retrying with domcontentloaded")
+                    await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
 
             # Wait for selector
             try:
@@ -68,7 +141,11 @@ async def fetch_dynamic_html(
                 logger.warning(f"[fetch_dynamic_html] wait_for_selector failed: {e}")
 
             # Extra time for lazy JS
-            await page.wait_for_timeout(3000)
+            if light:
+                settled = await wait_for_dom_stability(page)
+                logger.info(f"[fetch_dynamic_html] DOM {'settled' if settled else 'still changing after max wait'}.")
+            else:
+                await page.wait_for_timeout(FULL_RENDER_DELAY_MS)
 
             # Screenshot + debug HTML
             if debug:
@@ -102,7 +179,6 @@ async def fetch_dynamic_html(
                     f.write(html)
                 logger.info(f"[fetch_dynamic_html] Raw HTML saved: {debug_file}")
 
-            await browser.close()
             return html
 
     except Exception as e:
@@ -110,6 +186,16 @@ async def fetch_dynamic_html(
         return ""
 
 
+def fetch_time_budget(render_mode: str = "light") -> float:
+    """
+    Worst-case seconds scrape_and_filter spends fetching one URL with the default timeouts: the static request,
+    then a render (one navigation, two in "full" mode when networkidle times out; the selector wait; the settle delay).
+    """
+    navigations = 1 if render_mode == "light" else 2
+    settle_ms = DOM_STABILITY_MAX_WAIT_MS if render_mode == "light" else FULL_RENDER_DELAY_MS
+    return STATIC_FETCH_TIMEOUT + ((navigations + 1) * DYNAMIC_STEP_TIMEOUT_MS + settle_ms) / 1000
+
+
 def extract_page_metadata(html: str) -> dict:
     """Extract metadata with Trafilatura."""
     try:
@@ -158,55 +244,130 @@ def split_into_chunks(text: str, min_length: int = 200) -> list[str]:
     return chunks
 
 
+def chunk_clean_content(clean_text: str, chunking: dict | None = None) -> list[str]:
+    """Token-aware chunks with `chunking` (chunk_text keyword arguments), else the paragraph-based split_into_chunks."""
+    if not clean_text:
+        return []
+    if chunking:
+        return chunk_text(clean_text, **chunking)
+    return split_into_chunks(clean_text)
+
+
+def extract_document(html: str, chunking: dict | None = None) -> dict:
+    """
+    Metadata, clean text and chunks for one page. Pure CPU work, picklable,
+    so it can run inside the extraction process pool.
+    """
+    if not html:
+        return {"metadata": {}, "clean_content": "", "chunks": []}
+
+    # Step 2: metadata
+    metadata = extract_page_metadata(html) or {}
+
+    # Step 3: clean content
+    clean_text = extract_clean_content(html)
+    if not clean_text and len(html) > 5000:  # fallback for long pages
+        logger.warning("[Pipeline] Trafilatura extraction failed, falling back to BeautifulSoup")
+        soup = BeautifulSoup(html, "lxml")
+        # Remove script/style/noscript
+        for s in soup(["script", "style", "noscript"]):
+            s.decompose()
+        text = soup.get_text("\n")
+        # Clean up extra blank lines
+        clean_text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+    # Step 4: chunking
+    chunks = chunk_clean_content(clean_text, chunking)
+
+    return {"metadata": metadata, "clean_content": clean_text or "", "chunks": chunks}
+
+
 # ========== General Pipeline ==========
 
+def _result_from_cache(entry: dict, chunking: dict | None = None) -> dict:
+    chunks = entry.get("chunks") or []
+    if entry.get("chunking") != chunking:
+        # cached with other chunk settings: re-chunk the cached text instead of re-extracting the page
+        chunks = chunk_clean_content(entry.get("clean_content", ""), chunking)
+    return {
+        "metadata": entry.get("metadata") or {},
+        "raw_html": entry.get("html", ""),
+        "clean_content": entry.get("clean_content", ""),
+        "chunks": chunks,
+    }
+
+
 async def scrape_and_filter(
     url: str,
     min_html_length: int = 2000,
     wait_selector: str = "main, article, div.content, div#content, div.post, section",
     debug: bool = True,
     log_path: str = "autogen/log",
+    render_mode: str = "light",
+    use_cache: bool = True,
+    chunking: dict | None = None,
 ) -> dict:
-    """Full scrape pipeline with debug option."""
+    """Full scrape pipeline with debug option. Fresh pages are served from the on-disk page cache."""
     result = {"metadata": {}, "raw_html": "", "clean_content": "", "chunks": []}
 
     screenshot_path = log_path + "/dynamic_page_scraping/"
 
     logger.info(f"\n====== Scraping URL: {url} ======")
 
-    # Step 1: static fetch
-    html = fetch_static_html(url)
+    # Step 0: page cache (fresh hit skips the network, the render and the extraction)
+    cache = get_page_cache() if use_cache else None
+    cached = await asyncio.to_thread(cache.get, url) if cache else None
+    if cached and cached["fresh"]:
+        logger.info(f"[Pipeline] Page cache hit for {url}")
+        return await asyncio.to_thread(_result_from_cache, cached, chunking)
+
+    conditional_headers = {}
+    if cached:
+        if cached.get("etag"):
+            conditional_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            conditional_headers["If-Modified-Since"] = cached["last_modified"]
+
+    # Step 1: static fetch (conditional when we hold a stale copy)
+    resp = await fetch_static_page(url, headers=conditional_headers or None)
+    if cached and resp is not None and resp.status_code == 304:
+        logger.info(f"[Pipeline] Page cache revalidated (304) for {url}")
+        await asyncio.to_thread(cache.touch, url)
+        return await asyncio.to_thread(_result_from_cache, cached, chunking)
+
+    html = resp.text if (resp is not None and resp.ok) else ""
+    if resp is not None and not resp.ok:
+        logger.info(f"[fetch_static_html] Error fetching {url}: HTTP {resp.status_code}")
+    rendered = False
     if len(html) < min_html_length:
         logger.info("[Pipeline] Static fetch too short, trying dynamic...")
-        html = await fetch_dynamic_html(url, wait_selector=wait_selector, debug=debug, screenshot_path=screenshot_path)
-
-    result["raw_html"] = html or ""
-
-    # Step 2: metadata
-    result["metadata"] = extract_page_metadata(html) or {}
-
-    # Step 3: clean content
-    # clean_text = extract_clean_content(html)
-    # result["clean_content"] = clean_text or ""
+        html = await fetch_dynamic_html(url, wait_selector=wait_selector, debug=debug, screenshot_path=screenshot_path, render_mode=render_mode)
+        rendered = True
 
-    clean_text = extract_clean_content(html)
-    if not clean_text and len(html) > 5000:  # fallback for long pages
-        logger.warning("[Pipeline] Trafilatura extraction failed, falling back to BeautifulSoup")
-        soup = BeautifulSoup(html, "lxml")
-        # Remove script/style/noscript
-        for s in soup(["script", "style", "noscript"]):
-            s.decompose()
-        text = soup.get_text("\n")
-        # Clean up extra blank lines
-        clean_text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    if not html and cached:
+        logger.info(f"[Pipeline] Fetch failed, serving stale cached copy of {url}")
+        return await asyncio.to_thread(_result_from_cache, cached, chunking)
 
-    result["clean_content"] = clean_text or ""
+    result["raw_html"] = html or ""
 
-    # Step 4: chunking
-    result["chunks"] = split_into_chunks(clean_text) if clean_text else []
+    # Step 2-4: metadata, clean content and chunking (CPU-bound, runs in the extraction process pool)
+    extracted = await get_extraction_executor().extract(result["raw_html"], chunking=chunking)
+    result["metadata"] = extracted["metadata"]
+    result["clean_content"] = extracted["clean_content"]
+    result["chunks"] = extracted["chunks"]
 
     if not result["chunks"]:
         logger.warning(f"[Pipeline] No content extracted from {url}")
 
     logger.info(f"[Pipeline] Chunked into {len(result['chunks'])} segments.")
+
+    if cache and result["raw_html"]:
+        # ETag / Last-Modified describe the static body; a rendered page must not be revalidated (and reused) with them
+        validators = resp.headers if (resp is not None and resp.ok and not rendered) else {}
+        await asyncio.to_thread(
+            cache.put, url, result["raw_html"], result["metadata"], result["clean_content"], result["chunks"],
+            etag=validators.get("etag"),
+            last_modified=validators.get("last-modified"),
+            chunking=chunking,
+        )
     return result
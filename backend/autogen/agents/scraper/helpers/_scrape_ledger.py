@@ -0,0 +1,110 @@
+import hashlib
+import logging
+
+from ._page_cache import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+class ScrapeLedger:
+    """
+    Per-session record of what the WebScraperAgent already scraped and filtered for the current request.
+    Fallback retries consult it to skip URLs (and identical content) that were processed before,
+    and to add their new KEEP documents to the ones already kept instead of starting over.
+    The ledger resets when the agent receives a different request.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self._request_key: str | None = None
+        self._attempt = 0
+        self._urls: dict[str, dict] = {}            # canonical url -> {"content_hash", "decision", "attempt"[, "duplicate_of"]}
+        self._content_hashes: dict[str, str] = {}   # content hash -> canonical url that produced it
+        self._documents: list[dict] = []            # every document with content, in processing order
+        self._kept: list[tuple] = []                # ((attempt, source_index), document, filter_result)
+        self.skipped_urls = 0
+        self.skipped_duplicate_content = 0
+        self.collapsed_near_duplicates = 0
+
+    def start_request(self, request: str) -> None:
+        """Reset the ledger if `request` differs from the one it was built for."""
+        if request != self._request_key:
+            self._request_key = request
+            self._attempt = 0
+            self._urls.clear()
+            self._content_hashes.clear()
+            self._documents.clear()
+            self._kept.clear()
+            self.skipped_urls = 0
+            self.skipped_duplicate_content = 0
+            self.collapsed_near_duplicates = 0
+
+    def next_attempt(self) -> int:
+        self._attempt += 1
+        return self._attempt
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+    def seen_urls(self) -> set[str]:
+        return set(self._urls)
+
+    def has_url(self, url: str) -> bool:
+        return canonicalize_url(url) in self._urls
+
+    def should_skip(self, url: str) -> bool:
+        """True (and counted) if `url` was already processed for this request."""
+        if self.has_url(url):
+            self.skipped_urls += 1
+            return True
+        return False
+
+    def duplicate_of(self, document: dict) -> str | None:
+        """URL of an earlier document with the same clean content, if any."""
+        return self._content_hashes.get(self.content_hash(document.get("clean_content", "")))
+
+    def record(self, document: dict, source_index: int, decision: str | None, filter_result=None) -> None:
+        url = canonicalize_url(document.get("url", ""))
+        content_hash = self.content_hash(document.get("clean_content", ""))
+        self._urls[url] = {"content_hash": content_hash, "decision": decision, "attempt": self._attempt}
+        self._content_hashes.setdefault(content_hash, url)
+        self._documents.append(document)
+        if decision == "keep":
+            self._kept.append(((self._attempt, source_index), document, filter_result))
+
+    def record_collapsed(self, document: dict, canonical_url: str) -> None:
+        """
+        Record a near-duplicate collapsed into `canonical_url` without being filtered: later attempts skip its URL,
+        and it counts as neither kept nor dropped (the canonical page carries the decision).
+        """
+        url = canonicalize_url(document.get("url", ""))
+        content_hash = self.content_hash(document.get("clean_content", ""))
+        self._urls[url] = {
+            "content_hash": content_hash, "decision": None, "attempt": self._attempt,
+            "duplicate_of": canonicalize_url(canonical_url),
+        }
+        self._content_hashes.setdefault(content_hash, url)
+        self.collapsed_near_duplicates += 1
+
+    def kept(self) -> list[tuple]:
+        """(document, filter_result) pairs kept so far, ordered by attempt then source order."""
+        return [(document, result) for _, document, result in sorted(self._kept, key=lambda k: k[0])]
+
+    def kept_count(self) -> int:
+        return len(self._kept)
+
+    def dropped_count(self) -> int:
+        return sum(1 for entry in self._urls.values() if entry["decision"] == "drop")
+
+    def documents(self) -> list[dict]:
+        return list(self._documents)
+
+    def summary(self) -> dict:
+        return {
+            "attempts": self._attempt,
+            "processed_urls": len(self._urls),
+            "kept": len(self._kept),
+            "skipped_urls": self.skipped_urls,
+            "skipped_duplicate_content": self.skipped_duplicate_content,
+            "collapsed_near_duplicates": self.collapsed_near_duplicates,
+        }
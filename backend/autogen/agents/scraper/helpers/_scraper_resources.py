@@ -0,0 +1,37 @@
+import logging
+import threading
+
+from ._http_client import close_fetch_client
+from ._browser_pool import close_browser_pool
+from ._extraction_executor import shutdown_extraction_executor
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_users = 0
+
+
+def acquire_scraper_resources() -> None:
+    """
+    Register a user of the process-wide scraping resources (fetch client, browser pool, extraction processes).
+    Every WebScraperAgent holds one reference; pair each call with `release_scraper_resources`.
+    """
+    global _users
+    with _lock:
+        _users += 1
+
+
+async def release_scraper_resources() -> None:
+    """Drop a reference; the last user closes the shared resources (they are recreated on next use)."""
+    global _users
+    with _lock:
+        if _users <= 0:
+            return
+        _users -= 1
+        if _users > 0:
+            logger.info(f"[ScraperResources] Released, {_users} user(s) still scraping.")
+            return
+    logger.info(f"[ScraperResources] Last user released, closing the shared scraping resources.")
+    await close_fetch_client()
+    await close_browser_pool()
+    shutdown_extraction_executor()
@@ -46,4 +46,38 @@ User Travel Details:
 
 Content Chunk:
 {{chunk_text}}
-"""
\ No newline at end of file
+"""
+filter_tool_batch_prompt = """You are a strict content evaluator. Analyze EACH of the numbered content chunks below and decide, independently for each one, if it should be used for generating a travel itinerary for the user.
+
+You must evaluate every chunk based on the following four dimensions:
+1. **Accuracy**: Evaluate whether the information is factually correct. 
+2. **Up-to-date**: Determine whether the information appears current or outdated. 
+3. **Relevance**: Decide whether the chunk meaningfully addresses the user's travel preferences and constraints (user profile and travel details).
+4. **Safety**: Decide whether the chunk is contextually safe for the user (nothing offensive, misleading, violent, political, religious, or promoting deceptive offers).
+
+---
+
+### CRITICAL OUTPUT RULES (NO EXCEPTIONS)
+1. Output exactly TWO lines per chunk, in chunk order, and nothing else:
+
+   `<reason id="N">one sentence of reasoning</reason>`  
+   `<decision id="N">KEEP</decision>` or `<decision id="N">DROP</decision>`  
+
+2. `N` is the chunk number shown in `<chunk id="N">`. Every chunk from 1 to {{chunk_count}} MUST get exactly one decision.
+3. Do NOT merge chunks, skip chunks, or output summaries or any extra text.
+
+---
+
+Repeat Reminder:  
+- Your output is INVALID if any chunk from 1 to {{chunk_count}} is missing its `<decision id="N">` line.  
+---
+
+User Profile:
+{{user_profile}}
+
+User Travel Details:
+{{user_travel_details}}
+
+Content Chunks:
+{{chunks}}
+"""
@@ -1,10 +1,22 @@
 from ._ollama_client import OllamaClient
+from ._ollama_transport import OllamaTransport, AsyncOllamaTransport, GENERATION_READ_TIMEOUT, get_ollama_transport, get_async_ollama_transport, close_async_ollama_transport
+from ._llm_cache import LLMResponseCache, SQLiteCacheBackend, RedisCacheBackend, get_llm_response_cache
 from ._user_query_generation import extract_user_query, generate_user_query
 from ._dummy_data import DUMMY_USER_PROFILE, DUMMY_USER_TRAVEL_DETAILS, get_dummy_scraped_content
 from ._context_window import slice_items_to_batch, get_safe_max_characters, check_number_of_characters
 
 __all__ = [
     "OllamaClient",
+    "OllamaTransport",
+    "AsyncOllamaTransport",
+    "GENERATION_READ_TIMEOUT",
+    "get_ollama_transport",
+    "get_async_ollama_transport",
+    "close_async_ollama_transport",
+    "LLMResponseCache",
+    "SQLiteCacheBackend",
+    "RedisCacheBackend",
+    "get_llm_response_cache",
 
     "extract_user_query",
     "generate_user_query",
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# OLLAMA_RESPONSE_CACHE: "off" (default), "sqlite" or "redis"
+DEFAULT_LLM_CACHE_BACKEND = os.getenv("OLLAMA_RESPONSE_CACHE", "off").lower()
+DEFAULT_LLM_CACHE_PATH = os.getenv("OLLAMA_RESPONSE_CACHE_PATH", "log/llm_cache/responses.sqlite3")
+DEFAULT_LLM_CACHE_REDIS_URL = os.getenv("OLLAMA_RESPONSE_CACHE_URL", "redis://localhost:6379")
+DEFAULT_LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_LLM_CACHE_MAX_ENTRIES = 50_000
+
+
+class SQLiteCacheBackend:
+    """
+    Responses in one SQLite table (key, response, created_at, last_access).
+    Expired rows are never returned; past `max_entries` the least recently used rows are deleted.
+    """
+
+    def __init__(self, path: str = DEFAULT_LLM_CACHE_PATH, ttl: float = DEFAULT_LLM_CACHE_TTL_SECONDS, max_entries: int = DEFAULT_LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, response: str) -> int:
+        """Store `response`; returns how many entries were evicted (expired or over `max_entries`)."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, response, now, now))
+            evicted = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)).rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                evicted += self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)", (excess,)
+                ).rowcount
+            return evicted
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCacheBackend:
+    """
+    Responses as Redis strings (<prefix>:<key>) expiring after `ttl`, shared by every process using the same server.
+    A sorted set of keys by last access keeps the entry count under `max_entries` (least recently used go first).
+    """
+
+    def __init__(self, redis_url: str = DEFAULT_LLM_CACHE_REDIS_URL, ttl: float = DEFAULT_LLM_CACHE_TTL_SECONDS, max_entries: int = DEFAULT_LLM_CACHE_MAX_ENTRIES, prefix: str = "llm_cache"):
+        import redis   # sync client: OllamaClient.run is blocking
+        self.ttl = int(ttl)
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._index = f"{prefix}:index"
+        self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    def get(self, key: str) -> str | None:
+        response = self._redis.get(f"{self.prefix}:{key}")
+        if response is not None:
+            self._redis.zadd(self._index, {key: time.time()})
+        return response
+
+    def set(self, key: str, response: str) -> int:
+        now = time.time()
+        pipe = self._redis.pipeline()
+        pipe.set(f"{self.prefix}:{key}", response, ex=self.ttl)
+        pipe.zadd(self._index, {key: now})
+        # index entries of responses Redis already expired
+        pipe.zremrangebyscore(self._index, 0, now - self.ttl)
+        pipe.zcard(self._index)
+        evicted_expired, count = pipe.execute()[2:]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return evicted_expired
+        oldest = self._redis.zrange(self._index, 0, excess - 1)
+        pipe = self._redis.pipeline()
+        pipe.delete(*(f"{self.prefix}:{k}" for k in oldest))
+        pipe.zrem(self._index, *oldest)
+        pipe.execute()
+        return evicted_expired + len(oldest)
+
+    def size(self) -> int:
+        return self._redis.zcard(self._index)
+
+    def close(self) -> None:
+        self._redis.close()
+
+
+class LLMResponseCache:
+    """
+    Reuses LLM responses for byte-identical requests, keyed by sha256(model + options + prompt).
+    Only requests with an explicit temperature of zero are cached: without one Ollama samples with the model's
+    default temperature, and those answers are meant to vary (e.g. a critic retry must not replay a malformed answer).
+    Backend failures are logged and treated as misses, so the cache never breaks a call.
+    Hit/miss counters are exposed via `stats()`.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "uncacheable": 0, "errors": 0}
+
+    @staticmethod
+    def key_for(model: str, options: dict | None, prompt: str) -> str:
+        payload = json.dumps({"model": model, "options": options or {}, "prompt": prompt}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_cacheable(options: dict | None) -> bool:
+        temperature = (options or {}).get("temperature")
+        return temperature is not None and temperature <= 0
+
+    def _count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += n
+
+    def get(self, model: str, options: dict | None, prompt: str) -> str | None:
+        if not self.is_cacheable(options):
+            self._count("uncacheable")
+            return None
+        try:
+            response = self.backend.get(self.key_for(model, options, prompt))
+        except Exception as e:
+            logger.warning(f"[LLMResponseCache] Lookup failed: {e}")
+            self._count("errors")
+            return None
+        self._count("hits" if response is not None else "misses")
+        return response
+
+    def put(self, model: str, options: dict | None, prompt: str, response: str) -> None:
+        if not self.is_cacheable(options):
+            return
+        try:
+            evicted = self.backend.set(self.key_for(model, options, prompt), response)
+        except Exception as e:
+            logger.warning(f"[LLMResponseCache] Store failed: {e}")
+            self._count("errors")
+            return
+        self._count("stores")
+        self._count("evictions", evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {**counters, "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0}
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+_shared_cache: LLMResponseCache | None = None
+_shared_lock = threading.Lock()
+
+def get_llm_response_cache(backend: str = DEFAULT_LLM_CACHE_BACKEND) -> LLMResponseCache | None:
+    """Return the process-wide response cache for `backend` ("sqlite" or "redis"), or None when caching is off."""
+    global _shared_cache
+    if backend not in ("sqlite", "redis"):
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            try:
+                store = RedisCacheBackend() if backend == "redis" else SQLiteCacheBackend()
+            except Exception as e:
+                logger.warning(f"[LLMResponseCache] Could not open the {backend} cache ({e}), LLM responses will not be cached.")
+                return None
+            logger.info(f"[LLMResponseCache] Caching LLM responses in {backend}.")
+            _shared_cache = LLMResponseCache(store)
+        return _shared_cache
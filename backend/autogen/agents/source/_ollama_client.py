@@ -1,56 +1,118 @@
 import logging
 import re
-import requests
+import asyncio
 from typing import Optional
 
+from ._llm_cache import LLMResponseCache, get_llm_response_cache
+from ._ollama_transport import OllamaTransport, DEFAULT_READ_TIMEOUT, get_ollama_transport, get_async_ollama_transport
+
 logger = logging.getLogger(__name__)
 
 OLLAMA_URL = "http://localhost:11434/api/generate"
 DEFAULT_MODEL_NAME = "qwen3"
 
-## TODO: set up logging here, cuz it would get stuck in the call sometimes
-
 class OllamaClient:
-    def __init__(self, model: str = DEFAULT_MODEL_NAME, api_url: str = OLLAMA_URL):
+    def __init__(
+            self,
+            model: str = DEFAULT_MODEL_NAME,
+            api_url: str = OLLAMA_URL,
+            options: Optional[dict] = None,
+            cache: Optional[LLMResponseCache] = None,
+            transport: Optional[OllamaTransport] = None,
+            read_timeout: Optional[float] = DEFAULT_READ_TIMEOUT
+        ):
+        """
+        `options` are the Ollama generation options sent with every request (e.g. {"temperature": 0}).
+        `cache` reuses responses to identical requests made with {"temperature": 0} in `options`; by default the shared
+        cache selected by OLLAMA_RESPONSE_CACHE (off unless set).
+        `transport` sends the blocking requests (pooled, with timeouts and retries); by default the shared one.
+        `read_timeout` is how long a request may wait for the answer (None: no limit, e.g. GENERATION_READ_TIMEOUT
+        for long generations); a `timeout` given to `run` / `arun` overrides it.
+        Async callers use `arun`, which goes through the shared async transport instead.
+        """
         self._model = model
         self._api_url = api_url
+        self._options = options
+        self._cache = cache if cache is not None else get_llm_response_cache()
+        self._transport = transport
+        self._read_timeout = read_timeout
         self._raw_response = None
 
-    def run(self, prompt: str, stream: bool = False) -> Optional[str]:
-        """
-        Returns the raw LLM response string.
-        """
-
+    def _payload(self, prompt: str, stream: bool) -> dict:
         payload = {
             "model": self._model,
             "prompt": prompt,
             "stream": stream
         }
-
+        if self._options:
+            payload["options"] = self._options
         logger.verbose(f"[OllamaClient] Sending payload to ollama client {payload}...")
+        return payload
+
+    def _cached(self, prompt: str) -> Optional[str]:
+        cached = self._cache.get(self._model, self._options, prompt)
+        if cached is not None:
+            logger.info(f"[OllamaClient] Reusing cached response.")
+            self._raw_response = {"model": self._model, "response": cached, "cached": True}
+        return cached
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        return timeout if timeout is not None else self._read_timeout
+
+    def _output(self, raw_response: dict) -> str:
+        self._raw_response = raw_response
+        logger.verbose(f"[OllamaClient] Parsed JSON response: {raw_response}")
+        logger.info(f"[OllamaClient] Finished processing with Ollama.")
+        return raw_response["response"]
+
+    def run(self, prompt: str, stream: bool = False, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Returns the raw LLM response string (None on failure, including `timeout` seconds without a response).
+        """
+        use_cache = self._cache is not None and not stream
+        if use_cache and (cached := self._cached(prompt)) is not None:
+            return cached
 
         try:
-            # print("Sending request to Ollama...")
             logger.info(f"[OllamaClient] Sending request to Ollama...")
-            res = requests.post(self._api_url, json=payload)
-            logger.info(f"[OllamaClient] Received response: {res.status_code}")
-            res.raise_for_status()
-            raw_response = res.json()
-            self._raw_response = raw_response
-            logger.verbose(f"[OllamaClient] Parsed JSON response: {raw_response}")
-            output = raw_response["response"]
-            logger.info(f"[OllamaClient] Finished processing with Ollama.")
-            return output
-        
+            transport = self._transport or get_ollama_transport()
+            output = self._output(transport.post_json(self._api_url, self._payload(prompt, stream), timeout=self._timeout(timeout)))
         except Exception as e:
             logger.error(f"[OllamaClient] Ollama request failed: {str(e)}")
             return None
 
+        if use_cache:
+            self._cache.put(self._model, self._options, prompt, output)
+        return output
+
+    async def arun(self, prompt: str, stream: bool = False, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        `run` for async callers: the request does not block the event loop (cache lookups run in a worker thread).
+        """
+        use_cache = self._cache is not None and not stream
+        if use_cache and (cached := await asyncio.to_thread(self._cached, prompt)) is not None:
+            return cached
+
+        try:
+            logger.info(f"[OllamaClient] Sending request to Ollama...")
+            raw_response = await get_async_ollama_transport().post_json(self._api_url, self._payload(prompt, stream), timeout=self._timeout(timeout))
+            output = self._output(raw_response)
+        except Exception as e:
+            logger.error(f"[OllamaClient] Ollama request failed: {e!r}")
+            return None
+
+        if use_cache:
+            await asyncio.to_thread(self._cache.put, self._model, self._options, prompt, output)
+        return output
 
     @property
     def model(self) -> str:
         return self._model
 
+    @property
+    def cache(self) -> Optional[LLMResponseCache]:
+        return self._cache
+
     @property
     def raw_response(self) -> Optional[dict]:
         return self._raw_response
@@ -0,0 +1,154 @@
+import os
+import time
+import random
+import asyncio
+import logging
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 5.0                                          # seconds to reach the Ollama server
+DEFAULT_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "600"))  # seconds without a byte back (filter-sized requests)
+# content generation and critic answers can take much longer: no read timeout unless OLLAMA_GENERATION_READ_TIMEOUT is set
+GENERATION_READ_TIMEOUT = float(os.environ["OLLAMA_GENERATION_READ_TIMEOUT"]) if os.getenv("OLLAMA_GENERATION_READ_TIMEOUT") else None
+DEFAULT_MAX_RETRIES = 2                                                # retries after the first attempt
+DEFAULT_BACKOFF_BASE = 0.5                                             # seconds; doubles each retry (full jitter)
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_POOL_SIZE = 10                                                 # keep-alive connections to the server
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+# Connection failures and resets are retried. Read timeouts are not: the model is still busy,
+# and sending the same prompt again would only queue a second generation behind the first.
+_RETRY_EXCEPTIONS = (requests.ConnectionError, requests.exceptions.ChunkedEncodingError)
+_ASYNC_RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class OllamaTransport:
+    """
+    Blocking HTTP transport for the Ollama API.
+    One pooled requests.Session (keep-alive), a connect timeout plus the caller's read timeout on every call,
+    and up to `max_retries` retries with jittered backoff on 5xx responses and connection errors / resets.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def post_json(self, url: str, payload: dict, timeout: float | None = DEFAULT_READ_TIMEOUT) -> dict:
+        """
+        POST `payload` and return the decoded JSON body. `timeout` is the read timeout (None: wait for the answer
+        however long it takes). Raises the last error once the retries are used up.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = self._session.post(url, json=payload, timeout=(self.connect_timeout, timeout))
+                if res.status_code not in RETRY_STATUS_CODES:
+                    res.raise_for_status()
+                    return res.json()
+                error = requests.HTTPError(f"{res.status_code} from {url}", response=res)
+            except _RETRY_EXCEPTIONS as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            delay = backoff_delay(attempt)
+            logger.warning(f"[OllamaTransport] Attempt {attempt+1} failed ({error}), retrying in {delay:.2f}s...")
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class AsyncOllamaTransport:
+    """`OllamaTransport` for async callers, on a pooled httpx.AsyncClient."""
+
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def post_json(self, url: str, payload: dict, timeout: float | None = DEFAULT_READ_TIMEOUT) -> dict:
+        request_timeout = httpx.Timeout(timeout, connect=self.connect_timeout)
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = await self._client.post(url, json=payload, timeout=request_timeout)
+                if res.status_code not in RETRY_STATUS_CODES:
+                    res.raise_for_status()
+                    return res.json()
+                error = httpx.HTTPStatusError(f"{res.status_code} from {url}", request=res.request, response=res)
+            except _ASYNC_RETRY_EXCEPTIONS as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            delay = backoff_delay(attempt)
+            logger.warning(f"[AsyncOllamaTransport] Attempt {attempt+1} failed ({error!r}), retrying in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_shared_transport: OllamaTransport | None = None
+_shared_async_transport: AsyncOllamaTransport | None = None
+_shared_loop: asyncio.AbstractEventLoop | None = None
+
+def get_ollama_transport() -> OllamaTransport:
+    """Return the process-wide blocking transport, creating it on first use."""
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = OllamaTransport()
+    return _shared_transport
+
+def _discard_stale_async_transport(transport: AsyncOllamaTransport, loop: asyncio.AbstractEventLoop) -> None:
+    # the transport's connections belong to `loop`, so it can only be closed there
+    if not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(transport.aclose(), loop)
+    else:
+        logger.warning(f"[AsyncOllamaTransport] Event loop ended without close_async_ollama_transport(); dropping its transport.")
+
+def get_async_ollama_transport() -> AsyncOllamaTransport:
+    """
+    Return the process-wide async transport, creating it on first use.
+    The pool is bound to the running event loop, so a new loop (e.g. another asyncio.run) gets a new transport;
+    close it with `close_async_ollama_transport` before its loop ends.
+    """
+    global _shared_async_transport, _shared_loop
+    loop = asyncio.get_running_loop()
+    if _shared_async_transport is None or _shared_loop is not loop:
+        if _shared_async_transport is not None:
+            _discard_stale_async_transport(_shared_async_transport, _shared_loop)
+        _shared_async_transport = AsyncOllamaTransport()
+        _shared_loop = loop
+    return _shared_async_transport
+
+async def close_async_ollama_transport():
+    """Close the shared async transport (if any) and release its connections."""
+    global _shared_async_transport, _shared_loop
+    if _shared_async_transport is not None:
+        transport = _shared_async_transport
+        _shared_async_transport = None
+        _shared_loop = None
+        await transport.aclose()
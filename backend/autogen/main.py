@@ -4,7 +4,7 @@ import asyncio
 import logging
 import argparse
 
-from autogen.agents import AgentGroup
+from autogen.agents import AgentGroup, WebScraperAgent
 from .agents.source import generate_user_query
 from autogen.services import user_input_func, no_block_user_input, saving_object_to_jsonl
 
@@ -58,6 +58,8 @@ def run_system(case_num: int, folder: str = ""):
     with open(user_cases_path, "r") as f:
         test_cases = json.load(f)
 
+    WebScraperAgent.warm_up() # load the similarity model once for all cases
+
     for i, case in enumerate(test_cases):
         logger.info(f"Running autogen agent iteration {i+1} for user_id {case['user_profile']['user_id']}")
         query = "Hello, I need help with my travel plans. " + generate_user_query(case['user_profile'], case['user_travel_details'])
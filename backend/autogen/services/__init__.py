@@ -1,4 +1,5 @@
 from .amadeus import AmadeusService
+from .blob_store import BlobStore
 from ._time_tracker import TimingTracker
 from .google_map import GoogleMapsService
 from .local_state_service import LocalStateService
@@ -18,6 +19,7 @@ from .utils import (
 
 __all__ = [
     "AmadeusService",
+    "BlobStore",
     "TimingTracker",
     "GoogleMapsService",
     "LocalStateService",
@@ -0,0 +1,124 @@
+import os
+import mmap
+import time
+import zlib
+import hashlib
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOB_DIR = os.getenv("TRAVELAGENT_BLOB_DIR", "log/blobs")
+DEFAULT_MAX_BLOB_BYTES = int(os.getenv("TRAVELAGENT_BLOB_MAX_BYTES", str(1024 * 1024 * 1024)))   # compressed blobs kept on disk
+BLOB_REF_PREFIX = "sha256:"
+
+class BlobStore:
+    """
+    Content-addressed, zlib-compressed blob store on the filesystem.
+    Used for large artifacts (raw HTML, debug dumps) that should not live in Redis:
+    `put` returns a reference ("sha256:<hex>") that can be stored in session state instead,
+    identical content is written once, and `get_text` / `get_bytes` load a blob lazily when needed.
+    Total compressed size is capped at `max_bytes` with LRU eviction; a reference to an evicted blob loads as None.
+    """
+
+    def __init__(self, root_dir: str = DEFAULT_BLOB_DIR, compress_level: int = 6, max_bytes: int = DEFAULT_MAX_BLOB_BYTES):
+        self.root_dir = root_dir
+        self.compress_level = compress_level
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] | None = None   # digest -> {"size": int, "last_access": float}, loaded on first use
+        self._total_bytes = 0
+
+    @staticmethod
+    def is_ref(value) -> bool:
+        return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest[:2], digest + ".z")
+
+    def _load_index_locked(self) -> dict[str, dict]:
+        if self._index is None:
+            self._index = {}
+            for root, _, files in os.walk(self.root_dir):
+                for name in files:
+                    if not name.endswith(".z"):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    self._index[name[:-len(".z")]] = {"size": stat.st_size, "last_access": stat.st_atime}
+                    self._total_bytes += stat.st_size
+        return self._index
+
+    def put(self, data: str | bytes) -> str:
+        """Store `data` (str is UTF-8 encoded) and return its reference; evicts least recently used blobs when over `max_bytes`."""
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            compressed = zlib.compress(raw, self.compress_level)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # a unique temp file per writer: concurrent puts of the same content (threads or processes) cannot collide
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=digest, suffix=".tmp", delete=False) as f:
+                f.write(compressed)
+            os.replace(f.name, path)  # atomic, so readers never see a partial blob
+            with self._lock:
+                index = self._load_index_locked()
+                previous = index.get(digest)
+                if previous:
+                    self._total_bytes -= previous["size"]
+                index[digest] = {"size": len(compressed), "last_access": time.time()}
+                self._total_bytes += len(compressed)
+                self._evict_locked(keep=digest)
+        else:
+            self._touch(digest)
+        return BLOB_REF_PREFIX + digest
+
+    def _touch(self, digest: str) -> None:
+        with self._lock:
+            entry = self._load_index_locked().get(digest)
+            if entry:
+                entry["last_access"] = time.time()
+
+    def _evict_locked(self, keep: str) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        for digest, info in sorted(self._index.items(), key=lambda kv: kv[1]["last_access"]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+            self._total_bytes -= info["size"]
+            del self._index[digest]
+
+    def get_bytes(self, ref: str) -> bytes | None:
+        """Load a blob by reference; returns None if it is unknown or unreadable."""
+        if not self.is_ref(ref):
+            return None
+        digest = ref[len(BLOB_REF_PREFIX):]
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    raw = b""
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        raw = zlib.decompress(mm)
+        except (OSError, zlib.error) as e:
+            logger.warning(f"[BlobStore] Failed to read blob {ref}: {e}")
+            return None
+        self._touch(digest)
+        return raw
+
+    def get_text(self, ref: str) -> str | None:
+        raw = self.get_bytes(ref)
+        return raw.decode("utf-8", errors="replace") if raw is not None else None
+
+    def exists(self, ref: str) -> bool:
+        return self.is_ref(ref) and os.path.exists(self._path(ref[len(BLOB_REF_PREFIX):]))
@@ -1,6 +1,8 @@
 import json
+import asyncio
 import logging
 from collections import defaultdict
+from .blob_store import BlobStore
 from .redis_store.redis_storage import RedisStorage
 
 logger = logging.getLogger(__name__)
@@ -8,8 +10,10 @@ logger = logging.getLogger(__name__)
 class LocalStateService:
 
     # Basic Methods
-    def __init__(self, redis_store: RedisStorage):
+    def __init__(self, redis_store: RedisStorage, blob_store: BlobStore | None = None):
         self.redis_store = redis_store
+        # Large artifacts (raw HTML) go to the blob store; Redis keeps only their references
+        self.blob_store = blob_store or BlobStore()
         # In-memory per-session cache so the selector can read synchronously
         self._flag_cache: dict[str, dict[str, bool]] = defaultdict(dict)
 
@@ -128,32 +132,64 @@ class LocalStateService:
 
     # Methods for Web Scraper Agent
 
+    def _offload_raw_html(self, content):
+        """Move each item's raw_html into the blob store, leaving a `raw_html_ref` behind."""
+        if not isinstance(content, list):
+            return content
+        slim = []
+        for item in content:
+            if isinstance(item, dict) and "raw_html" in item:
+                item = dict(item)
+                raw_html = item.pop("raw_html") or ""
+                item["raw_html_ref"] = self.blob_store.put(raw_html) if raw_html else None
+            slim.append(item)
+        return slim
+
+    def _load_raw_html(self, content):
+        if not isinstance(content, list):
+            return content
+        for item in content:
+            if isinstance(item, dict) and item.get("raw_html_ref"):
+                item["raw_html"] = self.blob_store.get_text(item["raw_html_ref"]) or ""
+        return content
+
     async def set_scraped_content(self, agent_name: str, session_id: str, content: dict):
         key = self._make_key(agent_name, session_id, "scraped_content")
         latest_key = self._make_latest_key(agent_name)
         latest_session_key = self._make_latest_session_key(agent_name)
-        cleaned = self._clean(content)
-        await self.redis_store.redis.set(key, json.dumps(cleaned))
-        await self.redis_store.redis.set(f"{latest_key}:scraped_content", json.dumps(cleaned))
+        slim = await asyncio.to_thread(self._offload_raw_html, content)
+        serialized = json.dumps(self._clean(slim))
+        await self.redis_store.redis.set(key, serialized)
+        await self.redis_store.redis.set(f"{latest_key}:scraped_content", serialized)
         await self.redis_store.redis.set(f"{latest_session_key}:scraped_content", session_id)
 
-    async def get_scraped_content(self, agent_name: str, session_id: str) -> dict:
+    async def get_scraped_content(self, agent_name: str, session_id: str, include_raw_html: bool = False) -> dict:
         key = self._make_key(agent_name, session_id, "scraped_content")
         raw = await self.redis_store.redis.get(key)
-        return json.loads(raw) if raw else {}
+        content = json.loads(raw) if raw else {}
+        return await asyncio.to_thread(self._load_raw_html, content) if include_raw_html else content
     
-    async def get_latest_scraped_content(self, agent_name: str) -> dict:
+    async def get_latest_scraped_content(self, agent_name: str, include_raw_html: bool = False) -> dict:
         latest_key = self._make_latest_key(agent_name)
         raw = await self.redis_store.redis.get(f"{latest_key}:scraped_content")
-        return json.loads(raw) if raw else {}
+        content = json.loads(raw) if raw else {}
+        return await asyncio.to_thread(self._load_raw_html, content) if include_raw_html else content
+
+    async def get_raw_html(self, ref: str) -> str | None:
+        """Lazily load a raw HTML blob referenced from scraped content (for debugging)."""
+        return await asyncio.to_thread(self.blob_store.get_text, ref)
+
+    async def store_debug_artifact(self, data: str | bytes) -> str:
+        """Store a debug artifact (HTML dump, screenshot bytes, ...) in the blob store and return its reference."""
+        return await asyncio.to_thread(self.blob_store.put, data)
 
     async def set_filtered_chunks(self, agent_name: str, session_id: str, chunks: list):
         key = self._make_key(agent_name, session_id, "filtered_chunks")
         latest_key = self._make_latest_key(agent_name)
         latest_session_key = self._make_latest_session_key(agent_name)
-        cleaned = self._clean(chunks)
-        await self.redis_store.redis.set(key, json.dumps(cleaned))
-        await self.redis_store.redis.set(f"{latest_key}:filtered_chunks", json.dumps(cleaned))
+        serialized = json.dumps(self._clean(chunks))
+        await self.redis_store.redis.set(key, serialized)
+        await self.redis_store.redis.set(f"{latest_key}:filtered_chunks", serialized)
         await self.redis_store.redis.set(f"{latest_session_key}:filtered_chunks", session_id)
 
     async def get_filtered_chunks(self, agent_name: str, session_id: str) -> dict:
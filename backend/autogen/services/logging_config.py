@@ -16,7 +16,19 @@ ALLOWED_INFO_MODULES = [
     "autogen.agents.transaction.TransactionAgent",
     "autogen.agents.resource_selection.ResourceSelectionAgent",
     "autogen.agents.scraper.helpers._scrape_content_from_url",
+    "autogen.agents.scraper.helpers._save_content_to_file",
+    "autogen.agents.scraper.helpers._http_client",
+    "autogen.agents.scraper.helpers._browser_pool",
+    "autogen.agents.scraper.helpers._page_cache",
+    "autogen.agents.scraper.helpers._extraction_executor",
+    "autogen.agents.scraper.helpers._scraper_resources",
+    "autogen.agents.scraper.helpers._embedding_cache",
+    "autogen.agents.scraper.helpers._model_registry",
+    "autogen.agents.scraper.helpers._llm_filter_tool",
+    "autogen.agents.scraper.helpers._chunker",
     "autogen.agents.source._ollama_client",
+    "autogen.agents.source._llm_cache",
+    "autogen.agents.source._ollama_transport",
     "autogen.agents.agent_group",
     "autogen.agents.agent_group.AgentGroup",
     "autogen.evaluation.ground_truth_curation.evaluation",
@@ -1,16 +1,54 @@
 import json
+import time
 import uuid
 import asyncio
 import logging
 import argparse
+import numpy as np
 from pathlib import Path
+from datetime import datetime
 
-from autogen.agents import AgentGroup
-from autogen.services import user_input_func, no_block_user_input
-from autogen.agents.source import generate_user_query, DUMMY_USER_PROFILE, DUMMY_USER_TRAVEL_DETAILS
+from autogen.agents import AgentGroup, WebScraperAgent
+from autogen.services import user_input_func, no_block_user_input, TimingTracker
+from autogen.agents.source import OllamaClient, generate_user_query, get_dummy_scraped_content, DUMMY_USER_PROFILE, DUMMY_USER_TRAVEL_DETAILS
+from autogen.agents.scraper.helpers._nlp_filter_tool import NLPFilterTool, RELEVANCE_THRESHOLD, PREF_BYPASS_RELEVANCE
+from autogen.agents.scraper.helpers._recency import years_in_text
 
 logger = logging.getLogger(__name__)
 
+ONNX_PARITY_MAX_SCORE_DIFF = 0.02  # max allowed |torch - onnx| raw relevance difference
+ONNX_PARITY_MIN_COSINE = 0.99      # min allowed cosine between the torch and onnx embeddings of a text
+STREAMING_FILTER_DOCUMENTS = 8     # documents streamed through the LLM filter in the concurrency test
+STREAMING_FILTER_LATENCY = 0.5     # seconds each fake LLM filter call takes
+
+# Chunks and query for the ONNX parity test: clearly relevant, borderline and off-topic travel text
+ONNX_PARITY_QUERY = "best local food markets and street food to try in Tokyo"
+ONNX_PARITY_CHUNKS = [
+    "Tsukiji Outer Market is a maze of narrow lanes packed with stalls selling tamagoyaki, grilled scallops and fresh tuna. Go early and bring cash.",
+    "Ameya-Yokocho in Ueno is a busy street market where vendors sell dried fish, fruit skewers and takoyaki alongside cheap clothing.",
+    "Depachika, the basement food halls of Tokyo department stores such as Isetan and Mitsukoshi, sell bento, wagashi and tasting samples.",
+    "The Tokyo Metro day pass covers all nine lines and pays for itself after four rides; buy it at any ticket machine.",
+    "Shibuya Sky's rooftop observation deck is open until 22:30 and gives a view of the scramble crossing and, on clear days, Mount Fuji.",
+    "Kyoto's Nishiki Market, a five-block covered arcade, is known for pickles, soy milk doughnuts and skewered baby octopus.",
+    "Our hotel in Shinjuku had a small gym, a coin laundry on the third floor and a 15:00 check-in.",
+    "Travel insurance policies differ on coverage for cancelled flights, lost luggage and medical evacuation; read the exclusions carefully.",
+]
+
+CURRENT_YEAR = datetime.now().year
+
+# Travel page paragraphs and the years search_dates finds in them (absolute dates, relative expressions,
+# a relative expression anchored by a date elsewhere in the text, and no date at all)
+RECENCY_CASES = [
+    ("This guide was last reviewed in 2019. The gardens are open daily from June to September.", [2019]),
+    ("Updated March 3, 2024: the ferry to Miyajima now leaves every 15 minutes from the pier.", [2024]),
+    ("The shrine was founded in 1899 and restored in 2021 after the typhoon.", [1899, 2021]),
+    ("The timetable was updated today.", [CURRENT_YEAR]),
+    ("Bookings for the ryokan opened last year.", [CURRENT_YEAR - 1]),
+    ("The plaque was written in 2018 and the timetable was updated today.", [2018]),
+    ("Entry is free for children under 12 and the garden is calm.", []),
+    ("Tsukiji Outer Market is a maze of narrow lanes packed with stalls selling tamagoyaki, grilled scallops and fresh tuna. Go early and bring cash.", []),
+]
+
 async def run_test(
         agent_name: str, 
         case_num: int,
@@ -54,18 +92,22 @@ async def run_test(
         critic_enabled=critic_enabled,
     )
 
-    if agent_name == "scraper":
-        await test_agent.test_web_scraper_agent()
-    elif agent_name == "search":
-        await test_agent.test_search_agent()
-    elif agent_name == "content":
-        await test_agent.test_content_generation_agent()
-    elif agent_name == "critic":
-        await test_agent.test_critic_agent()
-    elif agent_name == "transaction":
-        await test_agent.test_transaction_agent()
-    else:
-        logger.info(f"Unknown agent name: {agent_name}")
+    try:
+        if agent_name == "scraper":
+            await test_agent.test_web_scraper_agent()
+        elif agent_name == "search":
+            await test_agent.test_search_agent()
+        elif agent_name == "content":
+            await test_agent.test_content_generation_agent()
+        elif agent_name == "critic":
+            await test_agent.test_critic_agent()
+        elif agent_name == "transaction":
+            await test_agent.test_transaction_agent()
+        else:
+            logger.info(f"Unknown agent name: {agent_name}")
+    finally:
+        # the pools are bound to this test's event loop
+        await test_agent.aclose()
 
 def get_test_critic_cases():
     base_dir = Path(__file__).resolve().parent
@@ -119,6 +161,78 @@ def test_llm_filter_feature_from_web(user_case: dict):
         filter_mode="llm"
     )),
 
+def test_hybrid_filter_feature_from_web(user_case: dict):
+    logger.info(f"Running test for WebScraperAgent on 'hybrid_filter_feature' test mode")
+    asyncio.run(run_test(
+        agent_name="scraper", 
+        case_num=1,
+        folder=f"test_hybrid_filter_feature", 
+        user_profile=user_case['user_profile'], 
+        user_travel_details=user_case['user_travel_details'],
+        test_filter=True,
+        filter_mode="hybrid"
+    )),
+
+def test_onnx_embedding_parity(user_case: dict):
+    logger.info(f"Running ONNX vs PyTorch embedding parity test on {len(ONNX_PARITY_CHUNKS)} fixed chunks")
+    chunks = list(ONNX_PARITY_CHUNKS)
+    assert chunks and ONNX_PARITY_QUERY, "ONNX parity test has no input chunks"
+
+    # no embedding cache, so both backends really run the encoder
+    torch_filter = NLPFilterTool(user_profile=user_case['user_profile'], use_embedding_cache=False, embedding_backend="torch")
+    onnx_filter = NLPFilterTool(user_profile=user_case['user_profile'], use_embedding_cache=False, embedding_backend="onnx")
+    try:
+        torch_embeddings = torch_filter.encode(chunks + [ONNX_PARITY_QUERY])
+        onnx_embeddings = onnx_filter.encode(chunks + [ONNX_PARITY_QUERY])
+        torch_results = torch_filter.filter_chunks(chunks, ONNX_PARITY_QUERY)
+        onnx_results = onnx_filter.filter_chunks(chunks, ONNX_PARITY_QUERY)
+    finally:
+        torch_filter.close()
+        onnx_filter.close()
+    assert len(torch_results) == len(onnx_results) == len(chunks), "ONNX parity test did not score every chunk"
+
+    # cosine between the two backends' embeddings of the same text
+    cosines = [
+        float(np.dot(t, o) / (np.linalg.norm(t) * np.linalg.norm(o)))
+        for t, o in zip(torch_embeddings, onnx_embeddings)
+    ]
+    min_cosine = min(cosines)
+
+    max_diff = 0.0
+    drifted = []
+    for i, (t, o) in enumerate(zip(torch_results, onnx_results)):
+        diff = abs(t['evidence']['relevance_raw'] - o['evidence']['relevance_raw'])
+        max_diff = max(max_diff, diff)
+        thresholds_crossed = [
+            name for name, threshold in (("RELEVANCE_THRESHOLD", RELEVANCE_THRESHOLD), ("PREF_BYPASS_RELEVANCE", PREF_BYPASS_RELEVANCE))
+            if (t['relevance_score'] > threshold) != (o['relevance_score'] > threshold)
+        ]
+        if t['final_decision'] != o['final_decision'] or thresholds_crossed:
+            drifted.append({"index": i, "torch": t['final_decision'], "onnx": o['final_decision'],
+                            "torch_relevance": round(t['relevance_score'], 4), "onnx_relevance": round(o['relevance_score'], 4),
+                            "thresholds_crossed": thresholds_crossed})
+
+    logger.info(f"ONNX parity: {len(chunks)} chunks, min embedding cosine {min_cosine:.4f}, "
+                f"max raw relevance diff {max_diff:.4f}, {len(drifted)} drifted")
+    for d in drifted:
+        logger.info(f"ONNX parity drift: {d}")
+
+    assert min_cosine >= ONNX_PARITY_MIN_COSINE, f"ONNX embeddings drift from PyTorch: cosine {min_cosine:.4f} (< {ONNX_PARITY_MIN_COSINE})"
+    assert max_diff <= ONNX_PARITY_MAX_SCORE_DIFF, f"ONNX relevance differs from PyTorch by {max_diff:.4f} (> {ONNX_PARITY_MAX_SCORE_DIFF})"
+    assert not any(d['torch'] != d['onnx'] for d in drifted), f"ONNX backend changes KEEP/DROP decisions: {drifted}"
+
+def test_recency_years(user_case: dict):
+    logger.info(f"Running recency test (years_in_text on fixed texts)")
+    mismatches = []
+    for i, (text, expected) in enumerate(RECENCY_CASES):
+        # twice: the second call is served from the cache and must agree too
+        found = [years_in_text(text), years_in_text(text)]
+        if any(years != expected for years in found):
+            mismatches.append({"index": i, "expected": expected, "got": found, "text": text[:80]})
+
+    logger.info(f"Recency: {len(RECENCY_CASES)} texts, {len(mismatches)} mismatches")
+    assert not mismatches, f"years_in_text returns unexpected years: {mismatches}"
+
 def test_search_agent_without_fallback(user_case: dict):
     logger.info(f"Running test for SearchAgent on 'search' test mode")
     asyncio.run(run_test(
@@ -162,11 +276,76 @@ def test_transaction_agent(user_case: dict):
         user_travel_details=user_case['user_travel_details']
     ))
 
+class _SlowLLMClient:
+    """Stands in for OllamaClient: every call answers DROP after STREAMING_FILTER_LATENCY seconds."""
+    model = "qwen3"
+    cache = None
+    response = "<think>test</think>\n<decision>DROP</decision>"
+
+    async def arun(self, prompt: str, stream: bool = False, timeout: float | None = None) -> str:
+        await asyncio.sleep(STREAMING_FILTER_LATENCY)
+        return self.response
+
+    def run(self, prompt: str, stream: bool = False, timeout: float | None = None) -> str:
+        time.sleep(STREAMING_FILTER_LATENCY)
+        return self.response
+
+    @staticmethod
+    def extract_based_on_tags(text: str, tag: str) -> str:
+        return OllamaClient.extract_based_on_tags(text, tag)
+
+class _NoopStateService:
+    async def set_filtered_chunks(self, **kwargs): pass
+    async def set_scraped_content(self, **kwargs): pass
+
+def test_streaming_filter_concurrency(user_case: dict):
+    logger.info(f"Running streaming LLM filter concurrency test ({STREAMING_FILTER_DOCUMENTS} documents, {STREAMING_FILTER_LATENCY}s per call)")
+    folder = Path("log/test_streaming_filter_concurrency")
+    agent = WebScraperAgent(
+        user_profile=user_case['user_profile'],
+        user_travel_details=user_case['user_travel_details'],
+        session_id=str(uuid.uuid4()),
+        redis_store=None,
+        timer_client=TimingTracker(user_id=user_case['user_profile']['user_id'], output_folder=str(folder)),
+        time_log_filename="timing_log.txt",
+        log_path=str(folder),
+        filter_method="llm",
+        dedupe_threshold=None,
+        llm_concurrency=STREAMING_FILTER_DOCUMENTS,
+    )
+    agent.llm_filter_agent.llm_client = _SlowLLMClient()
+    agent._local_state_service = _NoopStateService()
+
+    async def stream_documents(messages, cancellation_token=None, skip_url=None):
+        for i in range(STREAMING_FILTER_DOCUMENTS):
+            yield i, {"url": f"https://example.com/{i}", "title": f"Page {i}", "query": "tokyo food",
+                      "clean_content": f"Distinct test page number {i}.", "chunks": [], "metadata": {}}
+    agent.scraper.stream_scraped_content = stream_documents
+
+    async def run():
+        agent._ledger.start_request("tokyo food")
+        start = time.perf_counter()
+        try:
+            await agent.run_streaming_scrape_and_filter("tokyo food")
+            return time.perf_counter() - start
+        finally:
+            await agent.aclose()
+
+    elapsed = asyncio.run(run())
+    logger.info(f"Streaming filter of {STREAMING_FILTER_DOCUMENTS} documents took {elapsed:.2f}s "
+                f"(max latency {STREAMING_FILTER_LATENCY}s, sum {STREAMING_FILTER_DOCUMENTS * STREAMING_FILTER_LATENCY}s)")
+    assert agent._ledger.dropped_count() == STREAMING_FILTER_DOCUMENTS, f"Expected every document to be filtered, got {agent._ledger.summary()}"
+    assert elapsed < 2 * STREAMING_FILTER_LATENCY, f"LLM filter calls ran serially: {elapsed:.2f}s for {STREAMING_FILTER_DOCUMENTS} documents"
+
 TEST_FUNCTIONS = {
     "webscraper": lambda uc: test_web_scraper_agent_without_fallback(user_case=uc),
     "webscraper_fallback": lambda uc: test_web_scraper_agent_with_fallback(user_case=uc),
     "nlp_filter": lambda uc: test_nlp_filter_feature_from_web(user_case=uc),
     "llm_filter": lambda uc: test_llm_filter_feature_from_web(user_case=uc),
+    "hybrid_filter": lambda uc: test_hybrid_filter_feature_from_web(user_case=uc),
+    "onnx_parity": lambda uc: test_onnx_embedding_parity(user_case=uc),
+    "streaming_filter_concurrency": lambda uc: test_streaming_filter_concurrency(user_case=uc),
+    "recency_years": lambda uc: test_recency_years(user_case=uc),
     "search": lambda uc: test_search_agent_without_fallback(user_case=uc),
     "content": lambda uc: test_content_generation_agent(user_case=uc),
     "critic": lambda _: test_critic_agent(test_cases=get_test_critic_cases()),